@@ -161,3 +161,5 @@ confused with PyTables, which was developed to work with large data sets in dist
 environments. **BOTH PROJECTS ARE NOT AFFILIATED.**
 
 """
+
+from .helpers import sort_file
@@ -23,17 +23,25 @@
 ######################################################################################
 __docformat__ = "google"
 
-from .ttypes import getType, isTypeStr, getTypeConverter, NUMPY_TYPE
+from .ttypes import getType, isTypeStr, getTypeConverter, NUMPY_TYPE, NULL_VALUES
 from .helpers import is_iterable, elapsed_time
 from .required import NUMPY_ON
+from .storage import ListView, Categorical, PackedStrings, Bitmap, is_sequence, take
+from .mask import Mask
 import sys
 import math
 import inspect
+from datetime import timedelta
+from itertools import compress, repeat, islice
+from bisect import bisect_left, bisect_right
+from operator import eq, ne, lt, le, gt, ge, and_, not_, add, sub, mul, truediv
 
 class Column:
     """ General container to store data of a column. 
         Constructor should never be called from outside the package. 
     """
+    __slots__ = ("name", "data", "type", "fmt", "tostr", "_attrs", "_shared", "_valid", "_version", "_cache", \
+                 "_track", "_running", "_sketch", "_sorted")
     
     def __init__(self, name: str, desc: str = None):
         """ Creates a column with given name. 
@@ -49,10 +57,32 @@ class Column:
         self.type: str = None                    # 1 character that indicates type of this column.
         self.fmt: str  = None                    # used to convert dates and float to strings. 
         self.tostr = None                        # converter to string
-        self.attrs = {}                          # add attributes to save units, dates, etc
+        self._attrs = None                       # add attributes to save units, dates, etc (see attrs)
+        self._shared = False                     # True if data may be shared with views or clones
+        self._valid = None                       # bitmap that marks valid (not null) elements, None if all are valid
+        self._version = 0                        # incremented each time that data is modified (see _touch)
+        self._cache = None                       # results computed from data, e.g. stats, valid for current version
+        self._track = False                      # True if running aggregates are updated when data is appended (see track)
+        self._running = None                     # running aggregates used by stats, None if they must be recomputed
+        self._sketch = None                      # quantile sketch updated on appends if tracked, None if it must be recomputed
+        self._sorted = None                      # 1 (ascending), -1 (descending), 0 (not sorted) or None (unknown), see isSorted
         if desc: self.setAttr("desc", desc)
     
     
+    @property
+    def attrs(self) -> dict:
+        """ Dictionary with attributes of this column, e.g. units. 
+            It is only created the first time that it is needed.
+        """
+        if self._attrs is None: self._attrs = {}
+        return self._attrs
+    
+    
+    @attrs.setter
+    def attrs(self, attrs: dict):
+        self._attrs = attrs
+    
+    
     def accum(self, func, result):
         """ Applies function func to each element of column and saves result
             in list. Difference with reduce is that it produces a list.
@@ -75,11 +105,12 @@ class Column:
     def addData(self, data, ctype = None):
         """ Adds data to this column. 
             Args:
-                data: list or tuple with data of this column.
+                data: list or tuple with data of this column, or another column.
                       If column already has data, then it is appended.
                       Type of data should match type of this column if already set.
                       It is possible to pass an empty list to create a column that
                       is a placeholder. 
+                      Elements equal to None are stored as nulls (missing values).
                 
                 ctype: element of the same type of data stored in this column, e.g.
                       1, 0.1, "s". Only used if self.type has not been assigned.
@@ -93,27 +124,49 @@ class Column:
             NOTE: Only use this function to append list of many elements. To add 
                   only one element use append instead.
         """
-        assert is_iterable(data), "To add individual elements, use append"
+        assert is_sequence(data) or isinstance(data, Column), "To add individual elements, use append"
+        
+        valid, nulls = None, False
+        if isinstance(data, Column):                # keep nulls of other column
+            valid = data._valid
+            data = data.data
+        elif isinstance(data, (list, tuple)) and None in data:
+            valid, nulls = Bitmap.fromBools([e is not None for e in data]), True
+        
+        e0 = data[0] if len(data) > 0 else None
+        if nulls and e0 is None:
+            e0 = next((e for e in data if e is not None), None)
         
-        if not self.type and len(data) > 0:
-            self.type = getType(data[0])
+        if not self.type and e0 is not None:
+            self.type = getType(e0)
             self.tostr, self.fmt = getTypeConverter(self.type, "s", self.fmt)
-        elif self.type and len(data) > 0:           # have to check if types match
-            ntype = getType(data[0])
+        elif self.type and e0 is not None:           # have to check if types match
+            ntype = getType(e0)
             assert(ntype == self.type)
-        elif len(data) == 0 and ctype:
+        elif len(data) == 0 and ctype is not None:
             self.type = getType(ctype)
         elif len(data) == 0:
             self.type = None
-        elif not self.type and ctype:
+        elif not self.type and ctype is not None:   # only nulls
             ntype = getType(ctype)
             self.type = ntype
-            self.data = data
             self.tostr, self.fmt = getTypeConverter(ntype, "s", self.fmt)
+        elif self.type:                             # only nulls
+            pass
         else:
-            assert False
+            assert False, "Type cannot be inferred from nulls, use ctype"
         
-        self.data = self.data + data        
+        if nulls:
+            null = NULL_VALUES[self.type]
+            data = [null if e is None else e for e in data]
+        if valid is not None or self._valid is not None:
+            self._validity().extend(valid if valid is not None else Bitmap(len(data)))
+        
+        if isinstance(data, (Categorical, PackedStrings)) and len(self.data) == 0:
+            self.data = type(data)()             # keep encoding
+        self._own()
+        self._touch(added = data if valid is None else compress(data, valid))
+        self.data.extend(data)
         return self
     
     
@@ -135,16 +188,24 @@ class Column:
         
         
     def append(self, e):
-        """ Appends element e to this column. 
+        """ Appends element e to this column. If e is None, then appends a null (missing value).
             Returns: This column.
         """
-        # This can be costly, optimize later
-        nt = getType(e)
-        if not self.type: 
-            self.type = nt
+        if e is None:
+            assert self.type, "Type of column must be set before appending nulls"
+            self._validity().append(False)
+            e = NULL_VALUES[self.type]
         else:
-            assert nt == self.type, "self.type: %s, type(e): %s"%(self.type, nt)
+            # This can be costly, optimize later
+            nt = getType(e)
+            if not self.type: 
+                self.type = nt
+            else:
+                assert nt == self.type, "self.type: %s, type(e): %s"%(self.type, nt)
+            if self._valid is not None: self._valid.append(True)
         
+        self._own()
+        self._touch(added = [e] if self._valid is None or self._valid[-1] else [])
         self.data.append(e)
         return self
     
@@ -167,16 +228,85 @@ class Column:
         
         c = Column(name = self.name + "[idxs]")
         c.addData(ndata)
+        if self._valid is not None: c._valid = self._valid.take(idxs)
         return c
         
     
+    def argsort(self, reverse = False):
+        """ Returns a list with the positions of the elements of this column in sorted order,
+            i.e. [c[i] for i in c.argsort()] is sorted. Sorting is stable.
+            
+            Args:
+                reverse: if True, sort in descending order.
+            
+            NOTE: For categorical columns (see encode), strings are only compared to rank 
+                  categories and then elements are sorted by integer codes.
+        """
+        keys = self._sortKeys(nullsLast = not reverse)
+        return sorted(range(len(keys)), key = keys.__getitem__, reverse = reverse)
+        
+    
+    def between(self, lo, hi):
+        """ Returns positions of elements of this column such that lo <= c[i] <= hi, 
+            e.g. rows between two dates, using a sorted index (see buildIndex).
+            
+            Returns:
+                A list of positions ordered by value (ascending). Cost is O(log n + k),
+                where k is the number of positions returned.
+        """
+        keys, perm = self.buildIndex()._cache["index"]
+        a, b = bisect_left(keys, lo), bisect_right(keys, hi)
+        return list(range(a, b)) if perm is None else perm[a:b]
+    
+    
+    def buildIndex(self):
+        """ Builds a sorted index of this column to answer range queries (see between, ge, le
+            and searchsorted) using binary search. If data is already sorted, then only 
+            the data is used as index. Nulls are not included in the index.
+            
+            Returns: This column.
+            
+            NOTE: The index is kept until data in this column is modified. Methods that use the 
+                  index build it if necessary, so calling this method is optional.
+        """
+        if self._cache is None: self._cache = {}
+        if "index" in self._cache: return self
+        
+        data = self.data
+        if isinstance(data, Categorical): data = list(data)
+        if self._valid is not None:
+            perm = list(compress(range(len(data)), self._valid))
+            keys = [data[i] for i in perm]
+        else:
+            perm, keys = None, data
+        
+        if not self.isSorted():
+            order = sorted(range(len(keys)), key = keys.__getitem__)
+            perm = order if perm is None else [perm[i] for i in order]
+            keys = [keys[i] for i in order]
+        elif perm is None and not isinstance(keys, list):
+            keys = list(keys)
+        self._cache["index"] = (keys, perm)
+        return self
+    
+    
     def clone(self):
-        """ Returns an exact copy that does not shared data with this column (deep-copy)
+        """ Returns an exact copy of this column. 
+        
+            NOTE: Data is shared between both columns until one of them is modified (copy-on-write),
+                  so cloning is cheap and changes made to one column are never seen by the other one.
+                  Attributes are copied.
         """    
         c = Column(self.name)
-        c.fmt = self.fmt
-        ndata = self.data.copy()
-        c.addData(ndata)
+        c.type  = self.type
+        c.fmt   = self.fmt
+        c.tostr = self.tostr
+        c._attrs = dict(self._attrs) if self._attrs else None
+        c.data  = self.data
+        c._shared = self._shared = True
+        c._valid = self._valid.copy() if self._valid is not None else None
+        c._track, c._running = self._track, self._running
+        c._sorted = self._sorted
         return c
         
         
@@ -205,9 +335,8 @@ class Column:
                      Optional only if old type is string "s" (automatic conversion of strings). 
                 fmt: format used to convert dates to strings.
                      If present, then self.fmt is updated to fmt.      
-                default: if present, used as default value for missing elements. 
-                         If column contains empty strings, then it is required to
-                         convert column to float or int.                          
+                default: if present, used as default value for missing elements (empty strings). 
+                         If not present, empty strings are converted to nulls.
             Returns:
                 This column.
         """
@@ -222,20 +351,81 @@ class Column:
         #    new = getTypeStr(d0, self.fmt)
             
         f, fmt = getTypeConverter(old, new, self.fmt)
-        dd = []
-        for nd in self.data:
-            #print(">>" + str(nd) + "<<")   # DEBUG
-            if nd:
-                a = f(nd)
+        data = self.data
+        if isinstance(data, Categorical):    # only convert each category once
+            vals = [f(nd) if nd else default for nd in data.categories]
+            if new == "s" and None not in vals:
+                dd = Categorical.fromCodes(data.codes, vals)
             else:
-                a = default
-            dd.append(a)
+                dd = list(map(vals.__getitem__, data.codes))
+        else:
+            dd = []
+            for nd in data:
+                #print(">>" + str(nd) + "<<")   # DEBUG
+                if nd or old != "s":
+                    a = f(nd)
+                else:
+                    a = default
+                dd.append(a)
+        
+        if isinstance(dd, list) and None in dd:      # missing values are stored as nulls
+            valid = Bitmap.fromBools([a is not None for a in dd])
+            if self._valid is not None: 
+                valid = Bitmap.fromInt(valid.toInt() & self._valid.toInt(), len(dd))
+            self._valid = valid
+            null = NULL_VALUES[new]
+            dd = [null if a is None else a for a in dd]
             
         self.data = dd
+        self._shared = False
         self.type = new
+        self._touch()
         
         return self
     
+    def decode(self):
+        """ Stores data of a categorical or packed column as a plain list of strings (see encode and pack).
+            Returns: This column.
+        """
+        if isinstance(self.data, (Categorical, PackedStrings)):
+            self.data = list(self.data)
+            self._shared = False
+        return self
+    
+    
+    def encode(self):
+        """ Stores strings in this column as a categorical (dictionary-encoded) list, 
+            where each element is an integer code that points to a list of unique strings.
+            Useful for columns with few unique strings, e.g. station ids, quality flags or units.
+            
+            Returns: This column.
+            
+            NOTE: The column behaves the same after encoding, but it uses less memory 
+                  and indexesOf, argsort and convert work on the codes.
+        """
+        assert self.type == "s", "Only columns of strings can be encoded"
+        if not isinstance(self.data, Categorical):
+            self.data = Categorical(self.data)
+            self._shared = False
+        return self
+    
+    
+    def eq(self, other):
+        """ Compares elements of this column with other, e.g. c.eq("A").
+            
+            Args:
+                other: column of the same length or scalar.
+            
+            Returns:
+                A mask that is True where elements are equal (see comparison operators, e.g. c > 20.0). 
+                Comparisons with nulls are always False.
+            
+            NOTE: Operator == is not used for this, so columns can still be compared by identity, 
+                  e.g. c in table.cols.
+        """
+        return self._compare(other, eq)
+        
+    
     # def elapsedTime(self, start, fmt_date="%d/%m/%Y %H:%M:%S"):
         # """" Returns a list of floats that represent elapsed time in days since
             # start date.
@@ -254,6 +444,15 @@ class Column:
         return s
     
     
+    def ge(self, value):
+        """ Returns positions of elements of this column that are greater than or equal to value,
+            ordered by value, using a sorted index (see buildIndex).
+        """
+        keys, perm = self.buildIndex()._cache["index"]
+        a = bisect_left(keys, value)
+        return list(range(a, len(keys))) if perm is None else perm[a:]
+    
+    
     def head(self, n: int = 5, out = sys.stdout, sep = "\n", fmt = None, writeName = False):
         """ Prints first n elements of this column.
             
@@ -283,7 +482,12 @@ class Column:
     def indexes(self, filter):
         """ Return a list of indexes of the elements of the column that satisfy:
                 filter(i, c[i]) = True
+            
+            filter can also be a mask (see Mask), e.g. c.indexes(c > 20.0).
         """
+        if isinstance(filter, Bitmap):
+            assert len(filter) == len(self.data), "Mask and column must have the same length"
+            return list(compress(range(len(self.data)), filter))
         idx = []
         for i in range(len(self.data)):
             v = self.data[i]
@@ -291,6 +495,63 @@ class Column:
         return idx
     
 
+    def indexesOf(self, value):
+        """ Returns a list of indexes of the elements of the column that are equal to value.
+            Same as indexes(filter = lambda i, e: e == value), but faster.
+            For categorical columns only integer codes are compared.
+            Nulls are never equal to value.
+        """
+        data = self.data
+        if isinstance(data, Categorical):
+            k = data.code(value, add = False)
+            eqs = map(k.__eq__, data.codes) if k >= 0 else repeat(False, len(data))
+        elif isinstance(data, PackedStrings):
+            eqs = data.equals(value)
+        else:
+            eqs = map(eq, data, repeat(value))
+        if self._valid is not None:
+            eqs = map(and_, eqs, self._valid)
+        return list(compress(range(len(data)), eqs))
+    
+    
+    def indexesWithPrefix(self, prefix: str):
+        """ Returns a list of indexes of the elements of a column of strings that start with prefix.
+            For packed columns (see pack), strings are compared without decoding them.
+        """
+        assert self.type == "s"
+        data = self.data
+        if isinstance(data, PackedStrings):
+            return list(compress(range(len(data)), data.startswith(prefix)))
+        return list(compress(range(len(data)), map(str.startswith, data, repeat(prefix))))
+        
+    
+    def isNull(self, idx: int) -> bool:
+        """ Returns True if element c[idx] is null (missing value).
+        """
+        return self._valid is not None and not self._valid[idx]
+        
+    
+    def isSorted(self, reverse = False) -> bool:
+        """ Returns True if elements of this column are sorted in ascending order 
+            (or descending order if reverse is True). Nulls are ignored.
+            
+            NOTE: The order is checked in one pass only the first time that is needed, e.g. by 
+                  between or Table.join. It is then kept until data is modified. Sorting a table 
+                  sets it for the first column used to sort, and appending sorted data keeps it.
+        """
+        if self._sorted is None:
+            data = self.data
+            if self._valid is not None: data = compress(data, self._valid)
+            keys = data if isinstance(data, list) else list(data)
+            if all(map(le, keys, islice(keys, 1, None))):
+                self._sorted = 1
+            elif all(map(ge, keys, islice(keys, 1, None))):
+                self._sorted = -1
+            else:
+                self._sorted = 0
+        return self._sorted == (-1 if reverse else 1)
+    
+    
     def isBlank(self):
         """ Returns true if all elements in this column are blank or empty strings.
         """
@@ -315,19 +576,62 @@ class Column:
         c.type  = self.type
         c.fmt   = self.fmt
         c.tostr = self.tostr
-        c.attrs = self.attrs
+        c._attrs = self._attrs
         return c
         
     
+    def le(self, value):
+        """ Returns positions of elements of this column that are less than or equal to value,
+            ordered by value, using a sorted index (see buildIndex).
+        """
+        keys, perm = self.buildIndex()._cache["index"]
+        b = bisect_right(keys, value)
+        return list(range(b)) if perm is None else perm[:b]
+    
+    
+    def lengths(self):
+        """ Returns a list with the length of each string in this column.
+            For packed columns (see pack), lengths of ASCII strings are computed without decoding them.
+        """
+        assert self.type == "s"
+        if isinstance(self.data, PackedStrings):
+            return self.data.lengths()
+        return list(map(len, self.data))
+    
+    
     def longStr(self):
         """ Returns a string that describes content in this column, that includes
             attributes. For a shorter version, use __str__."""
         s = "Col[%12s] \t %4s< \t %8d \t %10s\n"%(self.name, self.type, len(self.data), self.fmt)
-        for k, a in self.attrs.items():
+        attrs = self._attrs if self._attrs else {}
+        for k, a in attrs.items():
             s = s + "   -- %s: %s\n"%(k, a)
         return s
 
 
+    def median(self):
+        """ Returns the median of this column (see quantile).
+        """
+        return self.quantile(0.5)
+    
+    
+    def nnulls(self) -> int:
+        """ Returns the number of null elements (missing values) in this column.
+        """
+        return 0 if self._valid is None else len(self.data) - self._valid.count()
+    
+    
+    def ne(self, other):
+        """ Compares elements of this column with other, e.g. c.ne("A").
+            
+            Returns:
+                A mask that is True where elements are not equal. Comparisons with nulls are always False.
+            
+            NOTE: See eq.
+        """
+        return self._compare(other, ne)
+        
+    
     def np(self):
         """ Returns a Numpy array that contains data in this column.
             
@@ -337,14 +641,21 @@ class Column:
                 
             NOTE: Data is not shared with the array, so changes made to the array are
                  not applied to this column and vice versa.
-                 String length is restricted to ttypes.MAX_STRING_LEN_NUMPY (=100)
+                 String length is restricted to ttypes.MAX_STRING_LEN_NUMPY (=100), 
+                 except for packed columns (see pack) that use the length of the longest string.
+                 Nulls are stored as the placeholders in ttypes.NULL_VALUES, e.g. NaN for floats.
         """
         assert NUMPY_ON, "Numpy is not installed."
         assert self.type != "d", "Not implemented for dates"
         import numpy as np
         
         nptype = NUMPY_TYPE[self.type]
-        a = np.array(self.data, dtype = nptype)
+        if isinstance(self.data, PackedStrings):
+            nptype = "S%d"%max(self.data.maxBytes(), 1)
+            buf, o = self.data.buffer, self.data.offsets
+            return np.array([bytes(buf[o[i]:o[i + 1]]) for i in range(len(self.data))], dtype = nptype)
+        data = self.data if isinstance(self.data, list) else list(self.data)
+        a = np.array(data, dtype = nptype)
         return a
         
         
@@ -358,12 +669,22 @@ class Column:
                       
             Return: This column.
             
+            NOTE: Nulls are not modified.
+            
             NOTE: If want a new list of values, use apply instead.
         """
-        nvals = []
-        for i in range(len(self.data)):
-            d = self.data[i]
-            self.data[i] = func(i, d)
+        self._own()
+        self._touch()
+        valid = self._valid.toBools() if self._valid is not None else None
+        if isinstance(self.data, PackedStrings):     # repack once
+            self.data = PackedStrings(self.apply(func))
+        elif valid:                                  # skip nulls
+            for i in range(len(self.data)):
+                if valid[i]: self.data[i] = func(i, self.data[i])
+        else:
+            for i in range(len(self.data)):
+                d = self.data[i]
+                self.data[i] = func(i, d)
             
         desc = inspect.getsource(func).strip()
         self.setAttr("map_filter", desc)
@@ -371,6 +692,25 @@ class Column:
         return self
         
 
+    def pack(self):
+        """ Stores strings in this column packed in a single buffer of UTF-8 bytes plus 
+            a list of offsets, which avoids the memory overhead of one Python string per element.
+            Useful for columns with many different strings, e.g. comments or paths.
+            For columns with few unique strings use encode instead.
+            
+            Returns: This column.
+            
+            NOTE: The column behaves the same after packing. Strings are decoded when they 
+                  are accessed, but lengths, indexesOf and indexesWithPrefix work on the buffer.
+                  Packed columns are not truncated when exported with np or Table.toH5.
+        """
+        assert self.type == "s", "Only columns of strings can be packed"
+        if not isinstance(self.data, PackedStrings):
+            self.data = PackedStrings(self.data)
+            self._shared = False
+        return self
+        
+    
     def print(self, out = sys.stdout, sep = "\n", fmt = None, writeName = False, start = 0, end = None):
         """ Write elements of column to out.
         
@@ -396,10 +736,60 @@ class Column:
         c, fmt = getTypeConverter(self.type, "s", self.fmt)
         for i in range(start, end):
             e = self.data[i]
-            s = c(e)
+            s = c(e) if not self.isNull(i) else ""
             out.write(s)
             out.write(sep)
     
+    def quantile(self, qs):
+        """ Computes one or several quantiles of this column, with linear interpolation between
+            elements (same as numpy.quantile), e.g. c.quantile([0.25, 0.5, 0.75]).
+            
+            Args:
+                qs: a float or a list of floats between 0.0 and 1.0.
+            
+            Returns:
+                A value or a list of values, one for each quantile in qs. 
+                For columns of ints, interpolated values are floats.
+            
+            NOTE: Only implemented for columns of ints, floats and dates. Nulls are skipped.
+                  Elements are partially sorted (numpy.partition if Numpy is installed, otherwise
+                  math.nth_elements), so cost is O(n) instead of O(n log n) for a full sort. 
+                  Results are cached until data in this column is modified.
+        """
+        assert self.type in ("i", "f", "d"), "Quantiles are only implemented for ints, floats and dates"
+        single = not is_iterable(qs)
+        qs = [qs] if single else list(qs)
+        assert all(0.0 <= q <= 1.0 for q in qs), "Quantiles must be between 0 and 1"
+        if self._cache is None: self._cache = {}
+        cache = self._cache
+        
+        todo = [q for q in qs if ("quantile", q) not in cache]
+        if todo:
+            data = self.data
+            if self._valid is not None: data = compress(data, self._valid)
+            data = list(data)
+            nel = len(data)
+            assert nel > 0, "Cannot compute quantiles of an empty column"
+            pos = {q: q * (nel - 1) for q in todo}
+            ks = sorted({int(p) for p in pos.values()} | {min(int(p) + 1, nel - 1) for p in pos.values()})
+            
+            if NUMPY_ON and self.type != "d":
+                import numpy as np
+                part = np.partition(np.array(data), ks)
+                nth = {k: part[k].item() for k in ks}
+            else:
+                from .math import nth_elements
+                nth = nth_elements(data, ks)
+            
+            for q, p in pos.items():
+                lo = int(p)
+                a, b = nth[lo], nth[min(lo + 1, nel - 1)]
+                cache[("quantile", q)] = a + (b - a) * (p - lo) if p > lo else a
+        
+        r = [cache[("quantile", q)] for q in qs]
+        return r[0] if single else r
+    
+    
     def reduce(self, func, result):
         """ Applies func on each element of this column and returns the final result.
             For example, to compute the minimum value of a column:
@@ -412,7 +802,13 @@ class Column:
             
             Returns:
                 The final result of calling func over all elements of this column.
+                Nulls are skipped.
         """
+        if self._valid is not None:
+            for i in compress(range(len(self.data)), self._valid):
+                result = func(i, self.data[i], result)
+            return result
+        
         for i in range(len(self.data)):
             e = self.data[i]
             result = func(i, e, result)
@@ -423,16 +819,32 @@ class Column:
         """ Removes elements (e[i]) of this column that satisfy: 
                     filter(i, e[i]) = True
             
+            filter can also be a mask (see Mask) with True for elements that should be removed, 
+            e.g. c.remove(c < 0.0).
+            
             Returns: This column after removing elements.
         """
-        ndata = []
+        if isinstance(filter, Bitmap):
+            c = self._gather(~Mask.of(filter))
+            self.data, self._valid, self._shared = c.data, c._valid, False
+            order = self._sorted
+            self._touch()
+            self._sorted = order or None     # removing elements keeps order, but may sort the column
+            return self
+        
+        keep = []
         for i in range(len(self.data)):
             v = self.data[i]
             if filter(i, v):
                 pass
             else:
-                ndata.append(v)
-        self.data = ndata
+                keep.append(i)
+        self.data = take(self.data, keep)
+        self._shared = False
+        order = self._sorted
+        self._touch()
+        self._sorted = order or None         # removing elements keeps order, but may sort the column
+        if self._valid is not None: self._valid = self._valid.take(keep)
         return self
         
     
@@ -460,6 +872,16 @@ class Column:
         return self
 
     
+    def searchsorted(self, value, side: str = "left") -> int:
+        """ Returns the number of elements of this column that are less than value (side = "left") 
+            or less than or equal to value (side = "right"), using a sorted index (see buildIndex).
+            Same as the position where value would be inserted in the sorted elements. Nulls are not counted.
+        """
+        assert side in ("left", "right"), side
+        keys, perm = self.buildIndex()._cache["index"]
+        return bisect_left(keys, value) if side == "left" else bisect_right(keys, value)
+    
+    
     def select(self, filter, name = None, desc = None):
         """ Creates a new column taking only the elements of this column that satisfy:
                 filter(i, c[i]) = True
@@ -471,14 +893,23 @@ class Column:
                 desc: If present used as descriptor for new column. If not present,
                       then a string representation of the filter is used as descriptor.
                 
+            filter can also be a mask (see Mask), e.g. c.select((c > 0.0) & (c < 1.0)).
+            
             Returns:
                 A new column with selected elements of this column.
         """
-        nd = self.collect(filter)
         if not name: name = "select(" + self.name + ")" 
+        if isinstance(filter, Bitmap):
+            c = self._gather(filter)
+            c.name, c._attrs = name, None
+            c.setAttr("selec_filter", desc.strip() if desc else "mask")
+            return c
+        
+        idxs = self.indexes(filter)
         if not desc: desc = inspect.getsource(filter)
             
-        c = Column(name).addData(nd)
+        c = Column(name).addData(take(self.data, idxs))
+        if self._valid is not None: c._valid = self._valid.take(idxs)
         c.setAttr("selec_filter", desc.strip())
         return c
         
@@ -494,29 +925,89 @@ class Column:
     def stats(self, verbose=True, out = sys.stdout):
         """ Returns a tuple with statistics of this column, e.g. min, max, sum, mean, stddev, nvalues.
             
-            NOTE: Only implemented for columns of floats.
+            NOTE: Only implemented for columns of ints, floats and dates. Nulls are skipped.
+                  Statistics are computed in a single pass (Welford's algorithm) and they are 
+                  cached until data in this column is modified.
             
             Args:
                 verbose: if True print statistics to out.
                 out: stream like object where information should be printed.
             
             Returns:
-                Tuple with (nvalues, min, max, mean, stddev)
+                Tuple with (nvalues, min, max, mean, stddev). For columns of dates,
+                mean is a date and stddev is a timedelta.
         """
-        assert self.type == "f"
-        max   = self.reduce(func = lambda i, v, result: result if result > v else v, result = -sys.float_info.max)
-        min   = self.reduce(func = lambda i, v, result: result if result < v else v, result = sys.float_info.max)
-        nvals = len(self.data)
-        sum   = self.reduce(func = lambda i, v, result: result + v, result = 0.0)
-        mean  = sum / nvals if nvals > 0 else 0.0
-        ss    = self.reduce(func = lambda i, v, result: result + (v - mean)*(v - mean), result = 0.0)
-        stddev= math.sqrt(ss / nvals) if nvals > 0 else 0.0
+        assert self.type in ("i", "f", "d"), "Statistics are only implemented for ints, floats and dates"
+        if self._cache is None: self._cache = {}
+        st = self._cache.get("stats")
+        if st is None:
+            running = self._running
+            if running is None:
+                data = self.data
+                if self._valid is not None: data = compress(data, self._valid)
+                running = self._accumulate(data)
+                if self._track: self._running = running
+            
+            nvals, mean, m2, min, max, origin = running
+            stddev = math.sqrt(m2 / nvals) if nvals > 0 else 0.0
+            if self.type == "d" and nvals > 0:
+                mean, stddev = origin + timedelta(seconds = mean), timedelta(seconds = stddev)
+            st = (nvals, min, max, mean, stddev)
+            self._cache["stats"] = st
         
         if verbose:
-            __fmt = "Column<< %s >> -- #values: %d \t min: %g \t max: %g \t mean: %g \t stddev: %g"
-            print(__fmt%(self.name, nvals, min, max, mean, stddev))
+            __fmt = "Column<< %s >> -- #values: %d \t min: %s \t max: %s \t mean: %s \t stddev: %s"
+            nvals, min, max, mean, stddev = st
+            __str = (lambda x: "%g"%x) if self.type != "d" else str
+            if nvals == 0: __str = lambda x: "n/a"              # empty or only nulls
+            print(__fmt%(self.name, nvals, __str(min), __str(max), __str(mean), __str(stddev)), file = out)
             
-        return (nvals, min, max, mean, stddev)
+        return st
+    
+    
+    def track(self, on = True):
+        """ Keeps running aggregates (count, min, max, mean and sum of squared deviations) and the quantile
+            sketch (see sketch) of this column, which are updated when data is appended with append or addData. 
+            Then, stats is O(1) after appending a few elements to a long column, e.g. when following a file 
+            that is growing. Other changes (e.g. map, remove, c[i] = e) force a full recompute the next time 
+            that stats or sketch are called.
+            
+            Args:
+                on: if False, stops tracking aggregates.
+            
+            Returns: This column.
+        """
+        assert self.type in ("i", "f", "d"), "Statistics are only implemented for ints, floats and dates"
+        self._track = on
+        self._running = self._sketch = None
+        return self
+    
+    
+    def sketch(self, k: int = 200):
+        """ Returns a sketch of the values of this column that can be used to compute approximate quantiles,
+            and that can be merged with sketches of other columns, e.g. of other files or chunks of data.
+            
+            Args:
+                k: parameter of the sketch that controls its size and error (see sketch.Sketch).
+                
+            Returns:
+                A new sketch. If this column is tracked (see track), then the column keeps its own sketch, 
+                which is updated when data is appended to this column, e.g. with Table.append, and 
+                a copy of it is returned, so merging other sketches into the result does not change the column.
+                
+            NOTE: Only implemented for columns of ints, floats and dates. Nulls are skipped.
+        """
+        assert self.type in ("i", "f", "d"), "Sketches are only implemented for ints, floats and dates"
+        if self._sketch is not None and self._sketch.k == k: return self._sketch.copy()
+        
+        from .sketch import Sketch
+        data = self.data
+        if self._valid is not None: data = compress(data, self._valid)
+        s = Sketch(k).extend(data)
+        if self._track: 
+            self._sketch = s
+            return s.copy()
+        return s
     
     
     def store(self, func, start: int = 0, end = None):
@@ -595,6 +1086,235 @@ class Column:
         return c
         
     
+    def view(self, start: int = None, stop: int = None, step: int = None):
+        """ Creates a new column that shares data with this column for elements in range(start, stop, step). 
+            Same as c[start:stop:step].
+            
+            Args:
+                start: position of first element in the view [OPTIONAL, DEFAULT = 0].
+                stop: position after the last element in the view [OPTIONAL, DEFAULT = len(c)].
+                step: step between elements in the view [OPTIONAL, DEFAULT = 1].
+            
+            Returns:
+                A new column with the same name, type, format and attributes of this column.
+            
+            NOTE: Data is not copied when the view is created. It is only copied when either
+                  the view or this column are modified (copy-on-write), so changes
+                  to one of them are never seen by the other one.
+        """
+        s = slice(start, stop, step)
+        if isinstance(self.data, ListView):
+            base, rng = self.data.base, self.data.rng[s]
+        else:
+            base, rng = self.data, range(len(self.data))[s]
+        
+        c = self.like()
+        c.data = ListView(base, rng)
+        if self._valid is not None: c._valid = self._valid.take(range(len(self.data))[s])
+        if self._sorted: c._sorted = self._sorted if (step or 1) > 0 else -self._sorted   # views of unsorted columns may be sorted
+        self._shared = True
+        return c
+        
+    
+    def _arith(self, other, op, symbol: str, reverse = False):
+        """ To be called internally to apply arithmetic operator op element by element.
+            
+            Args:
+                other: column of the same length or scalar (int or float).
+                op: function-like operator, e.g. operator.add.
+                symbol: string used to name the new column, e.g. "+".
+                reverse: if True, computes op(other, c) instead of op(c, other).
+            
+            Returns:
+                A new column of ints or floats. The type depends on the types of both operands 
+                and the operator, e.g. ints are divided or raised to negative powers as floats. 
+                Elements that are null in one of the operands are null in the result.
+        """
+        assert self.type in ("i", "f"), "Arithmetic is only implemented for ints and floats"
+        valid = self._valid
+        if isinstance(other, Column):
+            assert other.type in ("i", "f"), "Arithmetic is only implemented for ints and floats"
+            assert len(other) == len(self), "Columns must have the same length"
+            otype, oname, b = other.type, other.name, other.data
+            if other._valid is not None:
+                valid = other._valid if valid is None else Bitmap.fromInt(valid.toInt() & other._valid.toInt(), len(self))
+        else:
+            otype, oname, b = getType(other), repr(other), repeat(other, len(self))
+            assert otype in ("i", "f"), "Arithmetic is only implemented for ints and floats"
+        
+        a = self.data
+        if reverse: a, b = b, a
+        if valid is not None:        # do not operate on placeholders of nulls
+            r = [op(x, y) if ok else None for x, y, ok in zip(a, b, valid)]
+        else:
+            r = list(map(op, a, b))
+        
+        name = "(%s %s %s)"%(oname, symbol, self.name) if reverse else "(%s %s %s)"%(self.name, symbol, oname)
+        ntype = "f" if "f" in (self.type, otype) or op is truediv else "i"
+        if ntype == "i" and op is pow and any(isinstance(e, float) for e in r):    # e.g. 2 ** -1
+            ntype, r = "f", [float(e) if e is not None else None for e in r]
+        return Column(name).addData(r, ctype = NULL_VALUES[ntype])
+    
+    
+    def _compare(self, other, op):
+        """ To be called internally to compare elements with operator op.
+            
+            Args:
+                other: column of the same length or scalar.
+                op: function-like operator, e.g. operator.lt.
+            
+            Returns:
+                A mask. Comparisons with nulls are always False.
+        """
+        data, valid = self.data, self._valid
+        if isinstance(other, Column):
+            assert len(other) == len(self), "Columns must have the same length"
+            r = map(op, data, other.data)
+            if other._valid is not None: 
+                valid = other._valid if valid is None else Bitmap.fromInt(valid.toInt() & other._valid.toInt(), len(self))
+        elif op in (eq, ne) and isinstance(data, Categorical):       # compare codes
+            k = data.code(other, add = False)
+            r = map(op, data.codes, repeat(k))
+        elif op in (eq, ne) and isinstance(data, PackedStrings):     # compare bytes
+            r = data.equals(other) if op is eq else map(not_, data.equals(other))
+        else:
+            r = map(op, data, repeat(other))
+        m = Mask.fromBools(r)
+        return m & valid if valid is not None else m
+    
+    
+    def _gather(self, mask):
+        """ To be called internally to create a new column with the elements selected by mask,
+            without creating a list of indexes. The new column has the same name, type, 
+            format and attributes of this column.
+        """
+        assert len(mask) == len(self.data), "Mask and column must have the same length"
+        data = self.data
+        if isinstance(data, Categorical):
+            ndata = Categorical.fromCodes(compress(data.codes, mask), data.categories)
+        elif isinstance(data, PackedStrings):
+            ndata = data.take(compress(range(len(data)), mask))
+        else:
+            ndata = list(compress(data, mask))
+        
+        c = self.like()
+        c.data = ndata
+        c._sorted = self._sorted or None     # selected elements keep their order, but may be sorted
+        if self._valid is not None: c._valid = Bitmap.fromBools(compress(self._valid, mask))
+        if self._attrs is not None: c._attrs = dict(self._attrs)
+        return c
+    
+    
+    def _accumulate(self, values, running = None):
+        """ To be called internally to update running aggregates with values (Welford's algorithm).
+            
+            Args:
+                values: iterable with valid elements of this column.
+                running: tuple (nvals, mean, m2, min, max, origin) returned by a previous call.
+                         For columns of dates, mean and m2 are computed from the seconds 
+                         elapsed since origin (the first date).
+            
+            Returns:
+                Updated tuple of running aggregates.
+        """
+        nvals, mean, m2, min, max, origin = running if running else (0, 0.0, 0.0, None, None, None)
+        isdate = self.type == "d"
+        for v in values:
+            if isdate:
+                if origin is None: origin = v
+                x = (v - origin).total_seconds()
+            else:
+                x = v
+            nvals += 1
+            delta = x - mean
+            mean += delta / nvals
+            m2 += delta * (x - mean)
+            if min is None or v < min: min = v
+            if max is None or v > max: max = v
+        return (nvals, mean, m2, min, max, origin)
+    
+    
+    def _sortKeys(self, nullsLast = True):
+        """ To be called internally to get a list of keys to sort elements of this column.
+            For categorical columns, keys are the ranks of the categories. If there are nulls,
+            keys are tuples, so that nulls go after (nullsLast) or before other elements.
+        """
+        data = self.data
+        if isinstance(data, Categorical):
+            cats = data.categories
+            rank = [0] * len(cats)
+            for r, k in enumerate(sorted(range(len(cats)), key = cats.__getitem__)): 
+                rank[k] = r
+            keys = list(map(rank.__getitem__, data.codes))
+        else:
+            keys = data if isinstance(data, list) else list(data)
+        if self._valid is not None:
+            keys = [(0, k) if ok else (1, k) for k, ok in zip(keys, self._valid)] if nullsLast else \
+                   [(1, k) if ok else (0, k) for k, ok in zip(keys, self._valid)]
+        return keys
+    
+    
+    def _take(self, idxs):
+        """ To be called internally to create a new column with the elements at positions idxs.
+            The new column has the same name, type, format and attributes of this column.
+            Positions equal to None create nulls, e.g. rows without match in a join.
+        """
+        c = self.like()
+        if None in idxs:
+            data, valid = self.data, self._valid
+            null = NULL_VALUES[self.type] if self.type else None
+            c.data = [data[i] if i is not None else null for i in idxs]
+            c._valid = Bitmap.fromBools([i is not None and (valid is None or valid[i]) for i in idxs])
+        else:
+            c.data = take(self.data, idxs)
+            if self._valid is not None: c._valid = self._valid.take(idxs)
+        if self._attrs is not None: c._attrs = dict(self._attrs)
+        return c
+    
+    
+    def _touch(self, added = None):
+        """ To be called internally after modifying data. Invalidates cached results, e.g. stats.
+            
+            Args:
+                added: valid elements appended to this column, if data was only appended.
+                       Then, running aggregates are updated instead of recomputed (see track).
+        """
+        self._version += 1
+        self._cache = None
+        if added is None:
+            self._running = self._sketch = self._sorted = None
+            return
+        if self._running is None and self._sketch is None and not self._sorted: return
+        added = added if isinstance(added, list) else list(added)
+        if self._running is not None: self._running = self._accumulate(added, self._running)
+        if self._sketch is not None: self._sketch.extend(added)
+        if self._sorted and added:           # check that appended elements keep order
+            data, valid = self.data, self._valid
+            last = next((i for i in range(len(data) - 1, -1, -1) if valid is None or valid[i]), None)
+            seq = [data[last]] + added if last is not None else added
+            op = le if self._sorted > 0 else ge
+            if not all(map(op, seq, islice(seq, 1, None))): self._sorted = 0
+    
+    
+    def _validity(self):
+        """ To be called internally before adding nulls. 
+            Returns bitmap of valid elements, which is created if it does not exist.
+        """
+        if self._valid is None: self._valid = Bitmap(len(self.data))
+        return self._valid
+    
+    
+    def _own(self):
+        """ To be called internally before modifying data in place. 
+            Copies data if it is shared with views or clones, or if it is stored in a read-only container.
+        """
+        if not isinstance(self.data, (list, Categorical, PackedStrings)):
+            self.data = list(self.data)
+        elif self._shared:
+            self.data = self.data.copy()
+        self._shared = False
+    
+    
     def __str__(self):
         fmt = self.fmt if self.fmt else ""
         s = "Col[%12s] \t %4s< \t %8d \t %10s"%(self.name, self.type, len(self.data), self.fmt)
@@ -603,9 +1323,20 @@ class Column:
 
     def __getitem__(self, idx):
         #assert idx < len(self.data)
+        if isinstance(idx, slice):
+            return self.view(idx.start, idx.stop, idx.step)
+        if self._valid is not None and not self._valid[idx]:
+            return None
         return self.data[idx]
 
     def __setitem__(self, idx, value):
+        self._own()
+        self._touch()
+        if value is None:                  # null
+            self._validity()[idx] = False
+            value = NULL_VALUES[self.type]
+        elif self._valid is not None:
+            self._valid[idx] = True
         self.data[idx] = value
 
     def __len__(self):
@@ -613,8 +1344,42 @@ class Column:
 
 
     def __iter__(self):
-        for v in self.data:
-            yield v
+        if self._valid is not None:
+            for v, ok in zip(self.data, self._valid):
+                yield v if ok else None
+        else:
+            for v in self.data:
+                yield v
+    
+    
+    # Arithmetic operators create new columns, e.g. kpa = c / 1000.0 or c3 = c1 + c2.
+    # Operations are applied to all elements at once, so they are much faster than calling map.
+    def __add__(self, other):      return self._arith(other, add, "+")
+    def __radd__(self, other):     return self._arith(other, add, "+", reverse = True)
+    def __sub__(self, other):      return self._arith(other, sub, "-")
+    def __rsub__(self, other):     return self._arith(other, sub, "-", reverse = True)
+    def __mul__(self, other):      return self._arith(other, mul, "*")
+    def __rmul__(self, other):     return self._arith(other, mul, "*", reverse = True)
+    def __truediv__(self, other):  return self._arith(other, truediv, "/")
+    def __rtruediv__(self, other): return self._arith(other, truediv, "/", reverse = True)
+    def __pow__(self, other):      return self._arith(other, pow, "**")
+    def __rpow__(self, other):     return self._arith(other, pow, "**", reverse = True)
+    def __neg__(self):             return self._arith(-1, mul, "*")
+    
+    def __abs__(self):
+        assert self.type in ("i", "f"), "Arithmetic is only implemented for ints and floats"
+        c = Column("abs(%s)"%self.name).addData([abs(e) for e in self.data], ctype = NULL_VALUES[self.type])
+        if self._valid is not None: c._valid = self._valid.copy()
+        return c
+    
+    
+    # Comparison operators return a mask (True where condition is satisfied), e.g. c > 20.0 or c1 <= c2.
+    # Masks can be combined, e.g. (c > 20.0) & (c < 30.0), and passed to select, remove or Table.filter.
+    # == and != keep comparing columns by identity, use eq and ne to compare elements.
+    def __lt__(self, other): return self._compare(other, lt)
+    def __le__(self, other): return self._compare(other, le)
+    def __gt__(self, other): return self._compare(other, gt)
+    def __ge__(self, other): return self._compare(other, ge)
  
  
 if __name__ == "__main__":
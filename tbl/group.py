@@ -0,0 +1,188 @@
+######################################################################################
+# MIT License
+# 
+# Copyright (c) 2010-2024 Paulo A. Herrera
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+######################################################################################
+__docformat__ = "google"
+
+""" Group rows of a table by the values in some columns (keys) and aggregate other columns 
+    in each group, e.g.
+    ```
+        s = t.groupby(["station"]).agg({"WL": ["mean", "min", "max", "count"]})
+    ```
+"""
+from .column import Column
+from .storage import Categorical
+from .ttypes import getType
+
+from operator import itemgetter
+import math
+
+
+def _gather(data, rows):
+    """ Returns a tuple with elements of data at positions rows. """
+    if len(rows) == 1: return (data[rows[0]],)
+    return itemgetter(*rows)(data)
+
+
+def _std(vals):
+    n = len(vals)
+    if n == 0: return None
+    mean = sum(vals) / n
+    return math.sqrt(sum((v - mean) * (v - mean) for v in vals) / n)
+
+
+def _median(vals):
+    n = len(vals)
+    if n == 0: return None
+    s = sorted(vals)
+    return float(s[n // 2]) if n % 2 else (s[n // 2 - 1] + s[n // 2]) / 2
+
+
+AGGREGATIONS = {
+    "count":  len,
+    "sum":    lambda vals: sum(vals) if vals else None,
+    "mean":   lambda vals: sum(vals) / len(vals) if vals else None,
+    "min":    lambda vals: min(vals) if vals else None,
+    "max":    lambda vals: max(vals) if vals else None,
+    "std":    _std,
+    "median": _median,
+    "first":  lambda vals: vals[0] if vals else None,
+    "last":   lambda vals: vals[-1] if vals else None,
+}
+""" Functions used by GroupBy.agg, func(values of group without nulls) -> value. 
+    New aggregations can be added to this dictionary. 
+"""
+
+NUMERIC_AGGREGATIONS = {"sum", "mean", "std", "median"}
+""" Names of aggregations that are only allowed for columns of ints and floats. """
+
+
+class GroupBy:
+    """ Rows of a table grouped by the values in key columns. Created by Table.groupby.
+    """
+    __slots__ = ("table", "keys", "groups", "rows")
+    
+    def __init__(self, table, keys):
+        """ Groups rows of table in a single pass.
+            
+            Args:
+                table: Table with rows that are grouped.
+                keys: list of names or positions of columns in table.
+        """
+        self.table = table
+        """ Grouped table. """
+        
+        self.keys = [table[k] for k in keys]
+        """ Key columns. """
+        assert all(c is not None for c in self.keys), "Some keys are not present in table: " + str(keys)
+        
+        self.groups = []
+        """ List of tuples with values of keys in each group, in the order of their first row. """
+        
+        self.rows = []
+        """ List of lists with positions of rows in each group. """
+        
+        index = table._hashIndex(keys)                   # reuse index if present (see Table.buildHashIndex)
+        if index is not None:
+            self.groups, self.rows = list(index.keys()), list(index.values())
+        elif len(self.keys) == 1 and isinstance(self.keys[0].data, Categorical):
+            self.__groupCodes(self.keys[0])
+        else:
+            lookup = {}
+            groups, rows = self.groups, self.rows
+            for i, key in enumerate(zip(*self.keys)):
+                g = lookup.get(key)
+                if g is None:
+                    lookup[key] = len(rows)
+                    groups.append(key)
+                    rows.append([i])
+                else:
+                    rows[g].append(i)
+    
+    
+    def agg(self, spec: dict):
+        """ Aggregates columns in each group.
+            
+            Args:
+                spec: dictionary {column: aggregations}, where aggregations is a name or a list 
+                      of names in AGGREGATIONS, e.g. {"WL": ["mean", "min", "max", "count"]}.
+                      Aggregations in NUMERIC_AGGREGATIONS, e.g. mean, require ints or floats.
+            
+            Returns:
+                A new table with one row per group, the key columns and one column per aggregation,
+                named as column_aggregation, e.g. WL_mean. Nulls are skipped. Aggregations of groups
+                without valid values are nulls (count is 0).
+        """
+        from .table import Table
+        t = Table(self.table.name + "__groupby")
+        for j, k in enumerate(self.keys):
+            c = Column(k.name)
+            c.fmt = k.fmt
+            c.addData([g[j] for g in self.groups], ctype = k.data[0] if len(k) else None)
+            t.add(k.name, c, allowRepetition = True)
+        
+        for name, aggs in spec.items():
+            col = self.table[name]
+            assert col is not None, "Column is not present in table: " + str(name)
+            aggs = [aggs] if isinstance(aggs, str) else aggs
+            for a in aggs: 
+                assert a in AGGREGATIONS, "Unknown aggregation: " + a
+                assert a not in NUMERIC_AGGREGATIONS or col.type in ("i", "f"), \
+                    "Aggregation %s is only implemented for ints and floats: %s"%(a, col.name)
+            
+            data = col.data if isinstance(col.data, list) else list(col.data)
+            valid = col._valid.toBools() if col._valid is not None else None
+            values = []
+            for rows in self.rows:
+                if valid is not None: rows = [r for r in rows if valid[r]]
+                values.append(_gather(data, rows) if rows else ())
+            
+            for a in aggs:
+                f = AGGREGATIONS[a]
+                r = [f(vals) for vals in values]
+                cname = "%s_%s"%(col.name, a)
+                e0 = next((e for e in r if e is not None), None)
+                if e0 is None: e0 = 0 if a == "count" else data[0] if data else 0.0
+                c = Column(cname)
+                if getType(e0) == col.type: c.fmt = col.fmt     # e.g. min of dates
+                t.add(cname, c.addData(r, ctype = e0), allowRepetition = True)
+        return t
+    
+    
+    def __groupCodes(self, key):
+        """ To be called internally to group rows by the integer codes of a categorical column.
+        """
+        codes, cats = key.data.codes, key.data.categories
+        valid = key._valid.toBools() if key._valid is not None else None
+        first = {}
+        rows = [[] for k in cats] + [[]]                 # last list for nulls
+        for i, k in enumerate(codes):
+            if valid is not None and not valid[i]: k = -1
+            rows[k].append(i)
+            if k not in first: first[k] = i
+        order = sorted(first, key = first.__getitem__)
+        self.groups = [(cats[k] if k >= 0 else None,) for k in order]
+        self.rows = [rows[k] for k in order]
+    
+    
+    def __len__(self):
+        return len(self.groups)
@@ -325,6 +325,120 @@ def split_line(l: str, sep: str, strip = False) -> list[str]:
     return v
     
 
+def sort_file(src: str, dst: str, by, sep: str = ",", header = 1, skip = 0, conv = None, \
+              ascending = True, fmt_date: str = "%d/%m/%Y %H:%M:%S", memory_limit: int = 100_000_000, \
+              max_files: int = 64, encoding: str = "utf-8", verbose = False):
+    """ Sorts rows of a text file with tabular format that may be larger than available memory 
+        (external merge sort). Chunks of rows are sorted in memory and saved to temporary files,
+        which are merged at the end.
+        
+        Args:
+            src: path to file that should be sorted, e.g. saved with Table.save.
+            dst: path to file with sorted rows. Header and skipped lines are copied unchanged.
+            by: list of positions or names (if header = 1) of columns used to sort rows.
+            sep: string that separates columns as a regex (see Table.read).
+            header: line number that contains header (0 or 1, DEFAULT = 1).
+            skip: number of lines at beginning of file that should be skipped, e.g. comment lines.
+            conv: list with one function for each column in by that converts strings to values 
+                  that are compared, e.g. float or lambda s: datetime.strptime(s, fmt). 
+                  If not present, numbers are compared as floats and go before dates (parsed with fmt_date), 
+                  which go before other strings.
+            ascending: if False, sort rows in descending order.
+            fmt_date: format used to parse dates if conv is not present, e.g. %d/%m/%Y %H:%M:%S. 
+                      If None, dates are compared as strings.
+            memory_limit: approximate number of bytes of text sorted in memory at once.
+            max_files: max. number of temporary files that are merged (open) at once.
+            encoding: string that indicates file encoding.
+            verbose: if True, prints some information.
+        
+        Returns:
+            Number of sorted rows. Empty lines are removed.
+        
+        NOTE: Sorting is stable, so rows with the same key keep their order.
+    """
+    import heapq
+    import tempfile
+    from itertools import islice
+    
+    assert header <= 1, header
+    assert max_files >= 2, "At least two files must be merged at once"
+    by = by if is_iterable(by) else [by]
+    
+    def auto(v):
+        try:
+            return (0, float(v))
+        except ValueError:
+            pass
+        try:
+            return (1, datetime.strptime(v, fmt_date)) if fmt_date else (2, v)
+        except ValueError:
+            return (2, v)
+    conv = conv if conv else [auto] * len(by)
+    assert len(conv) == len(by), "conv must have one function for each column in by"
+    
+    def key(line):
+        v = re.split(sep, line.strip())
+        return tuple(f(v[k].strip()) for f, k in zip(conv, by))
+    
+    def flush(chunk):
+        chunk.sort(key = key, reverse = not ascending)
+        run = tempfile.TemporaryFile("w+", encoding = encoding)
+        run.writelines(chunk)
+        run.seek(0)
+        return run
+    
+    def merge(runs):
+        run = tempfile.TemporaryFile("w+", encoding = encoding)
+        run.writelines(heapq.merge(*runs, key = key, reverse = not ascending))
+        for r in runs: r.close()
+        run.seek(0)
+        return run
+    
+    levels = []                 # levels[i]: runs already merged i times, in the order of rows in src
+    def push(run, i = 0):
+        if len(levels) == i: levels.append([])
+        levels[i].append(run)
+        if len(levels[i]) == max_files:
+            runs, levels[i] = levels[i], []
+            push(merge(runs), i + 1)
+    
+    chunk, size, nrows = [], 0, 0
+    with open(src, "r", encoding = encoding) as fsrc:
+        top = list(islice(fsrc, skip + header))
+        if any(isinstance(k, str) for k in by):
+            assert header == 1, "Columns can only be selected by name if file has a header"
+            assert len(top) == skip + header, "File does not have a header: " + src
+            names = [h.strip().upper() for h in re.split(sep, top[-1].strip())]
+            by = [names.index(k.upper()) if isinstance(k, str) else k for k in by]
+        
+        for line in fsrc:
+            if not line.strip(): continue
+            if not line.endswith("\n"): line = line + "\n"
+            chunk.append(line)
+            size += len(line)
+            nrows += 1
+            if size >= memory_limit:
+                push(flush(chunk))
+                chunk, size = [], 0
+    
+    runs = [r for level in reversed(levels) for r in level]     # earlier rows first, so merge is stable
+    if verbose: print("Sorting %d rows in %d runs: %s"%(nrows, len(runs) + 1, src))
+    
+    with open(dst, "w", encoding = encoding) as fdst:
+        fdst.writelines(top)
+        if not runs:
+            chunk.sort(key = key, reverse = not ascending)
+            fdst.writelines(chunk)
+        else:
+            if chunk: runs.append(flush(chunk))
+            while len(runs) > max_files:
+                runs = [merge(runs[i:i + max_files]) for i in range(0, len(runs), max_files)]
+            fdst.writelines(heapq.merge(*runs, key = key, reverse = not ascending))
+            for run in runs: run.close()
+    
+    return nrows
+    
+
 def timeit(f, verbose = False, source=False):
     """ Time the execution time of function f. 
     
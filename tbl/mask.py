@@ -0,0 +1,98 @@
+######################################################################################
+# MIT License
+# 
+# Copyright (c) 2010-2024 Paulo A. Herrera
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+######################################################################################
+__docformat__ = "google"
+
+""" Boolean masks to select rows of columns and tables, e.g.
+    ```
+        m = (t["depth"] > 10.0) & (t["temp"] < 4.0)
+        t2 = t.filter(m)
+    ```
+"""
+from .storage import Bitmap
+
+from itertools import compress
+
+
+class Mask(Bitmap):
+    """ List of booleans packed as bits that marks selected elements of a column or rows of a table. 
+        Masks are created by comparing columns (see Column.__lt__, etc.) and can be combined 
+        with the operators & (and), | (or), ^ (xor) and ~ (not) without creating lists of indexes.
+        
+        NOTE: Masks cannot be used in if statements or with and/or/not, since it is not clear 
+              whether any or all elements should be True. Use any() or all() instead.
+    """
+    __slots__ = ()
+    
+    @classmethod
+    def of(cls, values):
+        """ Returns values if it is a mask. Otherwise, creates a mask from an iterable of booleans.
+        """
+        return values if isinstance(values, Mask) else cls.fromBools(values)
+    
+    
+    def any(self) -> bool:
+        """ Returns True if at least one element is True.
+        """
+        return self.toInt() != 0
+    
+    
+    def indexes(self):
+        """ Returns a list with the positions of the elements that are True.
+        """
+        return list(compress(range(self.n), self))
+    
+    
+    def __and__(self, other):
+        other = Mask.of(other)
+        assert len(other) == self.n, "Masks must have the same length"
+        return Mask.fromInt(self.toInt() & other.toInt(), self.n)
+    
+    
+    def __or__(self, other):
+        other = Mask.of(other)
+        assert len(other) == self.n, "Masks must have the same length"
+        return Mask.fromInt(self.toInt() | other.toInt(), self.n)
+    
+    
+    def __xor__(self, other):
+        other = Mask.of(other)
+        assert len(other) == self.n, "Masks must have the same length"
+        return Mask.fromInt(self.toInt() ^ other.toInt(), self.n)
+    
+    
+    def __invert__(self):
+        return Mask.fromInt(~self.toInt(), self.n)
+    
+    
+    __rand__ = __and__
+    __ror__  = __or__
+    __rxor__ = __xor__
+    
+    
+    def __bool__(self):
+        raise ValueError("The truth value of a mask is ambiguous. Use any() or all().")
+    
+    
+    def __repr__(self):
+        return "Mask(%d of %d)"%(self.count(), self.n)
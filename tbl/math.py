@@ -106,4 +106,48 @@ def moving_average(a, k: int, printeach = 10):
         
     bb = Column("Moving average").addData(b)
     return bb
+
+
+def nth_elements(values, ks):
+    """ Finds the k-th smallest elements of values for each k in ks without sorting all values. 
+        Uses a quickselect that partitions only the parts that contain some k (multiple selection)
+        and falls back to sorting a part if partitions are too unbalanced (introselect).
+        
+        Args:
+            values: iterable with elements that can be compared, e.g. floats.
+            ks: list of positions (0 <= k < len(values)) in the sorted list of values.
+        
+        Returns:
+            A dictionary k -> k-th smallest element.
+        
+        NOTE: Expected cost is O(n) for a few ks, versus O(n log n) for a full sort.
+    """
+    data = list(values)
+    nel = len(data)
+    assert all(0 <= k < nel for k in ks), "Positions out of range"
+    
+    result = {}
+    max_depth = 2 * max(nel, 1).bit_length()
+    parts = [(data, sorted(set(ks)), 0, 0)]      # (elements, ks, offset of first element, depth)
+    while parts:
+        part, pks, offset, depth = parts.pop()
+        if len(part) <= 16 or depth > max_depth:
+            part.sort()
+            for k in pks: result[k] = part[k - offset]
+            continue
+        
+        a, b, c = part[0], part[len(part) // 2], part[-1]      # median of three
+        pivot = sorted((a, b, c))[1]
+        lower = [e for e in part if e < pivot]
+        upper = [e for e in part if e > pivot]
+        first, last = offset + len(lower), offset + len(part) - len(upper)   # pivots in [first, last)
+        
+        for k in pks:
+            if first <= k < last: result[k] = pivot
+        klower = [k for k in pks if k < first]
+        kupper = [k for k in pks if k >= last]
+        if klower: parts.append((lower, klower, offset, depth + 1))
+        if kupper: parts.append((upper, kupper, last, depth + 1))
     
+    return result
+
@@ -0,0 +1,246 @@
+######################################################################################
+# MIT License
+# 
+# Copyright (c) 2010-2024 Paulo A. Herrera
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+######################################################################################
+__docformat__ = "google"
+
+""" Mergeable sketches to compute approximate quantiles of data that does not fit in memory
+    or that is split across files, chunks or processes, e.g.
+    ```
+        s = Sketch()
+        for src in files:
+            t, _ = Table.read(src)
+            s.merge(t["level"].convert("f").sketch())
+        q25, q50, q75 = s.quantile([0.25, 0.5, 0.75])
+    ```
+"""
+from itertools import islice, accumulate
+from bisect import bisect_left
+import math
+import random
+import re
+
+
+class Sketch:
+    """ KLL sketch (Karnin, Lang & Liberty, 2016) to compute approximate quantiles of a stream of values.
+        Values are stored in a hierarchy of compactors. When a compactor is full, it is sorted and 
+        every other value is promoted to the next level, where each value represents twice as many values.
+        
+        Memory is O(k log(n / k)) and the error in the rank of a quantile is around 1.7 / k of 
+        the number of values (about 1% with the default k = 200), independent of n.
+        Two sketches can be merged, e.g. to combine sketches of different files or processes.
+    """
+    __slots__ = ("k", "n", "min", "max", "levels", "size", "maxSize", "rnd")
+    
+    C = 2.0 / 3.0
+    """ Ratio between capacities of consecutive levels. """
+    
+    def __init__(self, k: int = 200, seed = None):
+        """ Creates an empty sketch.
+            
+            Args:
+                k: capacity of the top compactor. Larger values use more memory, but give smaller errors.
+                seed: seed of random generator used to compact values. If present, results are reproducible.
+        """
+        assert k >= 8, "k is too small"
+        self.k = k
+        """ Capacity of the top compactor. """
+        
+        self.n = 0
+        """ Number of values added to this sketch. """
+        
+        self.min = None
+        """ Minimum value added to this sketch. """
+        
+        self.max = None
+        """ Maximum value added to this sketch. """
+        
+        self.levels = []
+        """ Lists of stored values. Each value at level h represents 2**h values. """
+        
+        self.size = 0
+        self.maxSize = 0
+        self.rnd = random.Random(seed)
+        self.__grow()
+    
+    
+    def copy(self):
+        """ Returns a copy of this sketch, which can be modified without changing this sketch.
+        """
+        s = Sketch(self.k)
+        s.n, s.min, s.max = self.n, self.min, self.max
+        s.levels = [list(values) for values in self.levels]
+        s.size, s.maxSize = self.size, self.maxSize
+        s.rnd.setstate(self.rnd.getstate())
+        return s
+    
+    
+    def extend(self, values):
+        """ Adds all values in an iterable to this sketch.
+            Returns: This sketch.
+        """
+        it = iter(values)
+        while True:
+            batch = list(islice(it, max(self.maxSize - self.size, 1)))
+            if not batch: break
+            self.__add(batch)
+        return self
+    
+    
+    def merge(self, other):
+        """ Adds values summarized by other sketch to this sketch. Other sketch is not modified.
+            Both sketches must have the same k, since their errors would be different.
+            Returns: This sketch.
+        """
+        assert isinstance(other, Sketch)
+        assert other.k == self.k, "Sketches must have the same k: %d != %d"%(self.k, other.k)
+        if other.n == 0: return self
+        while len(self.levels) < len(other.levels): self.__grow()
+        for h, values in enumerate(other.levels):
+            self.levels[h].extend(values)
+        self.size += other.size
+        self.n += other.n
+        self.min = other.min if self.min is None or other.min < self.min else self.min
+        self.max = other.max if self.max is None or other.max > self.max else self.max
+        while self.size >= self.maxSize: self.__compress()
+        return self
+    
+    
+    def quantile(self, qs):
+        """ Returns approximate quantiles of values added to this sketch.
+            
+            Args:
+                qs: a float or a list of floats between 0.0 and 1.0. 
+            
+            Returns:
+                A value or a list of values, one for each quantile in qs. 
+                Quantiles 0.0 and 1.0 are exact (minimum and maximum values).
+        """
+        assert self.n > 0, "Sketch is empty"
+        single = not isinstance(qs, (list, tuple))
+        qs = [qs] if single else qs
+        assert all(0.0 <= q <= 1.0 for q in qs), "Quantiles must be between 0 and 1"
+        
+        items = sorted((v, 1 << h) for h, values in enumerate(self.levels) for v in values)
+        values = [v for v, w in items]
+        cum = list(accumulate(w for v, w in items))
+        total = cum[-1]
+        r = []
+        for q in qs:
+            if q <= 0.0:   r.append(self.min)
+            elif q >= 1.0: r.append(self.max)
+            else:          r.append(values[min(bisect_left(cum, q * total), len(values) - 1)])
+        return r[0] if single else r
+    
+    
+    def update(self, value):
+        """ Adds a single value to this sketch.
+            Returns: This sketch.
+        """
+        return self.extend((value,))
+    
+    
+    def __add(self, batch):
+        """ To be called internally to add a list of values to the first level. 
+        """
+        lo, hi = min(batch), max(batch)
+        self.min = lo if self.min is None or lo < self.min else self.min
+        self.max = hi if self.max is None or hi > self.max else self.max
+        self.levels[0].extend(batch)
+        self.size += len(batch)
+        self.n += len(batch)
+        while self.size >= self.maxSize: self.__compress()
+    
+    
+    def __capacity(self, h):
+        """ To be called internally to get the capacity of level h. Lower levels are smaller.
+        """
+        depth = len(self.levels) - h - 1
+        return int(math.ceil(self.k * Sketch.C ** depth)) + 1
+    
+    
+    def __compress(self):
+        """ To be called internally to compact levels that are full. 
+        """
+        for h in range(len(self.levels)):
+            values = self.levels[h]
+            if len(values) >= self.__capacity(h):
+                if h + 1 >= len(self.levels): self.__grow()
+                values.sort()
+                keep = [values.pop()] if len(values) % 2 else []
+                promoted = values[self.rnd.getrandbits(1)::2]
+                self.levels[h + 1].extend(promoted)
+                self.levels[h] = keep
+                self.size -= len(values) - len(promoted)
+                if self.size < self.maxSize: break
+    
+    
+    def __grow(self):
+        """ To be called internally to add a level at the top.
+        """
+        self.levels.append([])
+        self.maxSize = sum(self.__capacity(h) for h in range(len(self.levels)))
+    
+    
+    def __len__(self):
+        return self.n
+    
+    
+    def __str__(self):
+        return "Sketch[k = %d, n = %d, stored = %d]"%(self.k, self.n, self.size)
+        
+
+def sketch_file(src: str, col, sep: str = ",", header = 1, skip = 0, conv = float, \
+                k: int = 200, encoding: str = "utf-8"):
+    """ Computes a sketch of a column of a text file that has tabular format, 
+        reading it line by line, so memory does not depend on the size of the file.
+        
+        Args:
+            src: path to file.
+            col: position or name (if header = 1) of the column.
+            sep: string that separates columns as a regex (see Table.read).
+            header: line number that contains header (0 or 1, DEFAULT = 1).
+            skip: number of lines at beginning of file that should be skipped, e.g. comment lines.
+            conv: function that converts strings to values, e.g. float. Empty strings are skipped.
+            k: parameter of the sketch (see Sketch).
+            encoding: string that indicates file encoding.
+        
+        Returns:
+            A new sketch with values in the column.
+    """
+    assert header <= 1, header
+    s = Sketch(k)
+    with open(src, "r", encoding = encoding) as f:
+        lines = islice(f, skip, None)
+        if header == 1:
+            names = [h.strip() for h in re.split(sep, next(lines).strip())]
+            if isinstance(col, str): col = [h.upper() for h in names].index(col.upper())
+        assert isinstance(col, int), "Columns can only be selected by name if file has a header"
+        
+        def values():
+            for l in lines:
+                l = l.strip()
+                if not l: continue
+                v = re.split(sep, l)[col].strip()
+                if v: yield conv(v)
+        s.extend(values())
+    return s
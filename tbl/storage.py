@@ -0,0 +1,490 @@
+######################################################################################
+# MIT License
+# 
+# Copyright (c) 2010-2024 Paulo A. Herrera
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+######################################################################################
+__docformat__ = "google"
+
+""" Read-only containers that columns use to store their data without copying it. """
+
+from itertools import accumulate
+from array import array
+
+
+class ListView:
+    """ Read-only view of a range of elements of a list (or of another view). 
+        Elements are not copied, so the view reflects the data of the list it was created from.
+        
+        NOTE: Constructor should never be called from outside the package.
+              Columns create views by calling Column.view.
+    """
+    __slots__ = ("base", "rng")
+    
+    def __init__(self, base, rng: range):
+        """ Creates a view.
+        
+            Args:
+                base: list (or sequence) that stores the data.
+                rng: range with the positions of elements in base that are part of this view.
+        """
+        self.base = base
+        self.rng = rng
+    
+    
+    def copy(self):
+        """ Returns a list with the elements of this view.
+        """
+        return list(self)
+    
+    
+    def __len__(self):
+        return len(self.rng)
+    
+    
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            r = self.rng[idx]
+            if r.step > 0:
+                return self.base[r.start:r.stop:r.step]
+            else:
+                return [self.base[i] for i in r]
+        return self.base[self.rng[idx]]
+    
+    
+    def __iter__(self):
+        r = self.rng                            # only elements of the view are visited
+        if r.step > 0 and isinstance(self.base, list):
+            return iter(self.base[r.start:r.stop:r.step])
+        else:
+            return map(self.base.__getitem__, r)
+
+
+class Categorical:
+    """ Dictionary-encoded list of strings. Each element is stored as an integer code 
+        that points to a list of unique strings (categories), so repeated strings, 
+        e.g. station ids or units, are stored only once.
+        
+        It supports the same operations that columns use on lists: len, indexing, 
+        iteration, append, extend and copy.
+    """
+    __slots__ = ("codes", "categories", "lookup")
+    
+    def __init__(self, values = ()):
+        """ Creates a categorical list.
+        
+            Args:
+                values: iterable with strings [OPTIONAL].
+        """
+        self.codes = array("i")
+        """ Code of each element as an array of ints. """
+        
+        self.categories = []
+        """ List of unique strings. Element i is equal to categories[codes[i]]. """
+        
+        self.lookup = {}
+        """ Dictionary {string: code}. """
+        
+        self.extend(values)
+    
+    
+    @staticmethod
+    def fromCodes(codes, categories):
+        """ Creates a categorical list from a list of codes and a list of unique strings.
+        """
+        c = Categorical()
+        c.codes = array("i", codes)
+        c.categories = list(categories)
+        c.lookup = {s: i for i, s in enumerate(c.categories)}
+        return c
+    
+    
+    def append(self, value: str):
+        """ Appends value at the end of this list.
+        """
+        self.codes.append(self.code(value))
+    
+    
+    def code(self, value: str, add = True) -> int:
+        """ Returns the code of value. 
+        
+            Args:
+                value: string.
+                add: if True, value is added to categories if it is not present. 
+                     If False, returns -1 for values that are not present. 
+        """
+        k = self.lookup.get(value)
+        if k is None:
+            if not add: return -1
+            assert isinstance(value, str), "Only strings can be stored as categories: " + str(value)
+            k = len(self.categories)
+            self.categories.append(value)
+            self.lookup[value] = k
+        return k
+        
+    
+    def copy(self):
+        """ Returns a copy of this list. 
+        """
+        return Categorical.fromCodes(self.codes, self.categories)
+    
+    
+    def extend(self, values):
+        """ Appends all strings in values at the end of this list.
+        """
+        if values is self: 
+            values = values.copy()
+        if isinstance(values, Categorical):     # only need to translate codes 
+            m = [self.code(s) for s in values.categories]
+            self.codes.extend(map(m.__getitem__, values.codes))
+        else:
+            self.codes.extend(map(self.code, values))
+    
+    
+    def take(self, idxs):
+        """ Returns a new categorical list with elements at positions idxs, 
+            and a copy of the categories of this list (codes are not changed). 
+        """
+        c = Categorical.fromCodes((), self.categories)
+        codes = self.codes
+        c.codes = array("i", [codes[i] for i in idxs])
+        return c
+        
+    
+    def __len__(self):
+        return len(self.codes)
+    
+    
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return list(map(self.categories.__getitem__, self.codes[idx]))
+        return self.categories[self.codes[idx]]
+    
+    
+    def __setitem__(self, idx, value):
+        self.codes[idx] = self.code(value)
+    
+    
+    def __iter__(self):
+        return map(self.categories.__getitem__, self.codes)
+        
+
+class PackedStrings:
+    """ List of strings packed in a single buffer of UTF-8 bytes, where element i is stored 
+        in buffer[offsets[i]:offsets[i+1]]. It avoids the memory overhead of one str object 
+        per element. Strings are only decoded when they are accessed.
+        
+        It supports the same operations that columns use on lists: len, indexing, 
+        iteration, append, extend and copy.
+    """
+    __slots__ = ("buffer", "offsets")
+    
+    def __init__(self, values = ()):
+        """ Creates a packed list.
+        
+            Args:
+                values: iterable with strings [OPTIONAL].
+        """
+        self.buffer = bytearray()
+        """ Encoded strings. """
+        
+        self.offsets = array("q", [0])
+        """ Position of the first byte of each string in buffer (+ 1 element for the end of the last string). """
+        
+        self.extend(values)
+    
+    
+    def append(self, value: str):
+        """ Appends value at the end of this list.
+        """
+        self.buffer += value.encode("utf-8")
+        self.offsets.append(len(self.buffer))
+    
+    
+    def copy(self):
+        """ Returns a copy of this list. 
+        """
+        p = PackedStrings()
+        p.buffer = bytearray(self.buffer)
+        p.offsets = array("q", self.offsets)
+        return p
+    
+    
+    def equals(self, value: str):
+        """ Returns a list of booleans that are True for elements equal to value.
+            Strings are compared as bytes, without decoding them.
+        """
+        v = value.encode("utf-8")
+        n = len(v)
+        buf, o = self.buffer, self.offsets
+        return [o[i + 1] - o[i] == n and buf.startswith(v, o[i]) for i in range(len(o) - 1)]
+    
+    
+    def extend(self, values):
+        """ Appends all strings in values at the end of this list.
+        """
+        if values is self: 
+            values = values.copy()
+        if isinstance(values, PackedStrings):     # only need to shift offsets
+            end = len(self.buffer)
+            self.buffer += values.buffer
+            self.offsets.extend([end + o for o in values.offsets[1:]])
+        else:
+            enc = [v.encode("utf-8") for v in values]
+            end = len(self.buffer)
+            self.buffer += b"".join(enc)
+            ends = accumulate(map(len, enc), initial = end)
+            next(ends)                            # skip initial value, already in offsets
+            self.offsets.extend(ends)
+    
+    
+    def lengths(self):
+        """ Returns a list with the number of characters of each string.
+            If all strings are ASCII, they are computed from offsets without decoding.
+        """
+        o = self.offsets
+        if self.buffer.isascii():
+            return [o[i + 1] - o[i] for i in range(len(o) - 1)]
+        return [len(s) for s in self]
+    
+    
+    def maxBytes(self) -> int:
+        """ Returns the length of the longest string as number of bytes.
+        """
+        o = self.offsets
+        return max([o[i + 1] - o[i] for i in range(len(o) - 1)], default = 0)
+    
+    
+    def startswith(self, prefix: str):
+        """ Returns a list of booleans that are True for elements that start with prefix.
+            Strings are compared as bytes, without decoding them.
+        """
+        p = prefix.encode("utf-8")
+        buf, o = self.buffer, self.offsets
+        return [buf.startswith(p, o[i], o[i + 1]) for i in range(len(o) - 1)]
+    
+    
+    def take(self, idxs):
+        """ Returns a new packed list with elements at positions idxs. 
+        """
+        buf, o = self.buffer, self.offsets
+        p = PackedStrings()
+        enc = [buf[o[i]:o[i + 1]] for i in idxs]
+        p.buffer = bytearray(b"".join(enc))
+        p.offsets = array("q", accumulate(map(len, enc), initial = 0))
+        return p
+    
+    
+    def __len__(self):
+        return len(self.offsets) - 1
+    
+    
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(len(self))[idx]]
+        o = self.offsets
+        if idx < 0: idx = idx + len(o) - 1
+        if idx < 0 or idx >= len(o) - 1: raise IndexError("PackedStrings index out of range")
+        return self.buffer[o[idx]:o[idx + 1]].decode("utf-8")
+    
+    
+    def __setitem__(self, idx, value):
+        """ Replaces element at position idx. It has to move the rest of the buffer, 
+            so it is slower than for a list.
+        """
+        o = self.offsets
+        if idx < 0: idx = idx + len(o) - 1
+        v = value.encode("utf-8")
+        start, end = o[idx], o[idx + 1]
+        self.buffer[start:end] = v
+        delta = len(v) - (end - start)
+        if delta != 0:
+            for i in range(idx + 1, len(o)): o[i] += delta
+    
+    
+    def __iter__(self):
+        buf, o = self.buffer, self.offsets
+        for i in range(len(o) - 1):
+            yield buf[o[i]:o[i + 1]].decode("utf-8")
+        
+
+_BITS_TO_ASCII = bytes.maketrans(b"\x00\x01", b"01")
+
+
+class Bitmap:
+    """ List of booleans packed as bits (1 bit per element), e.g. to mark valid (non-null) 
+        elements of a column. Bit i is stored in byte i // 8 at position i % 8.
+    """
+    __slots__ = ("bits", "n")
+    
+    def __init__(self, n: int = 0, value: bool = True):
+        """ Creates a bitmap with n elements equal to value.
+        """
+        self.bits = bytearray((b"\xff" if value else b"\x00") * ((n + 7) // 8))
+        """ Packed bits. Bits after the last element are not used. """
+        
+        self.n = n
+        """ Number of elements. """
+    
+    
+    @classmethod
+    def fromBools(cls, values):
+        """ Creates a bitmap from an iterable of values that are interpreted as True or False.
+        """
+        b = bytes(map(bool, values))
+        m = cls()
+        m.n = len(b)
+        x = int(b.translate(_BITS_TO_ASCII)[::-1], 2) if b else 0
+        m.bits = bytearray(x.to_bytes((m.n + 7) // 8, "little"))
+        return m
+    
+    
+    @classmethod
+    def fromBytes(cls, bits, n: int):
+        """ Creates a bitmap with n elements from packed bits, e.g. bitmap.bits of another bitmap.
+        """
+        m = cls()
+        m.n = n
+        m.bits = bytearray(bits)
+        return m
+    
+    
+    @classmethod
+    def fromInt(cls, x: int, n: int):
+        """ Creates a bitmap with n elements from the bits of integer x (bit i = element i).
+        """
+        m = cls()
+        m.n = n
+        m.bits = bytearray((x & ((1 << n) - 1)).to_bytes((n + 7) // 8, "little"))
+        return m
+    
+    
+    def all(self) -> bool:
+        """ Returns True if all elements are True.
+        """
+        return self.count() == self.n
+    
+    
+    def append(self, value: bool):
+        """ Appends an element at the end of this bitmap.
+        """
+        i = self.n
+        if i % 8 == 0: self.bits.append(0)
+        self.n = i + 1
+        self[i] = value
+    
+    
+    def copy(self):
+        """ Returns a copy of this bitmap.
+        """
+        m = type(self)()
+        m.bits = bytearray(self.bits)
+        m.n = self.n
+        return m
+    
+    
+    def count(self) -> int:
+        """ Returns the number of elements that are True.
+        """
+        return bin(self.toInt()).count("1")
+    
+    
+    def extend(self, values):
+        """ Appends all elements in values (an iterable or a bitmap) at the end of this bitmap.
+        """
+        other = values if isinstance(values, Bitmap) else Bitmap.fromBools(values)
+        n, k = self.n, other.n
+        off = n % 8                             # only the last byte of this bitmap is changed
+        del self.bits[(n + 7) // 8:]
+        x = other.toInt() << off
+        if off:
+            x |= self.bits[-1] & ((1 << off) - 1)
+            self.bits[-1:] = x.to_bytes((off + k + 7) // 8, "little")
+        else:
+            self.bits += x.to_bytes((k + 7) // 8, "little")
+        self.n = n + k
+    
+    
+    def take(self, idxs):
+        """ Returns a new bitmap with the elements at positions idxs (an iterable or a range).
+        """
+        if isinstance(idxs, range) and idxs.step == 1:     # shift bits of bytes in range
+            start = min(idxs.start, self.n)
+            stop = min(max(idxs.stop, start), self.n)
+            x = int.from_bytes(self.bits[start // 8:(stop + 7) // 8], "little") >> (start % 8)
+            return Bitmap.fromInt(x & ((1 << (stop - start)) - 1), len(idxs))
+        bits = self.bits
+        return Bitmap.fromBools([(bits[i >> 3] >> (i & 7)) & 1 for i in idxs])
+    
+    
+    def toBools(self):
+        """ Returns a list of booleans with the elements of this bitmap.
+        """
+        return list(self)
+    
+    
+    def toInt(self) -> int:
+        """ Returns elements of this bitmap as the bits of an integer (bit i = element i).
+        """
+        return int.from_bytes(self.bits, "little") & ((1 << self.n) - 1)
+    
+    
+    def __len__(self):
+        return self.n
+    
+    
+    def __getitem__(self, idx: int) -> bool:
+        if idx < 0: idx = idx + self.n
+        if idx < 0 or idx >= self.n: raise IndexError("Bitmap index out of range")
+        return (self.bits[idx >> 3] >> (idx & 7)) & 1 == 1
+    
+    
+    def __setitem__(self, idx: int, value: bool):
+        if idx < 0: idx = idx + self.n
+        if idx < 0 or idx >= self.n: raise IndexError("Bitmap index out of range")
+        if value:
+            self.bits[idx >> 3] |= (1 << (idx & 7))
+        else:
+            self.bits[idx >> 3] &= ~(1 << (idx & 7)) & 0xff
+    
+    
+    def __iter__(self):
+        s = format(self.toInt(), "b").zfill(self.n)[::-1]
+        return map("1".__eq__, s[:self.n])
+        
+
+def is_sequence(obj):
+    """ Returns True if obj is a list, tuple or one of the containers used 
+        to store data of columns.
+    """
+    return isinstance(obj, (list, tuple, ListView, Categorical, PackedStrings))
+
+
+def take(data, idxs):
+    """ Returns a new container, of the same kind as data when possible, with the elements 
+        of data at positions idxs.
+        
+        Args:
+            data: list or one of the containers used to store data of columns.
+            idxs: iterable with positions of elements.
+    """
+    if isinstance(data, (Categorical, PackedStrings)):
+        return data.take(idxs)
+    return [data[i] for i in idxs]
@@ -24,8 +24,11 @@
 __docformat__ = "google"
 
 from .column import Column
+from .storage import Categorical, PackedStrings, Bitmap
+from .mask import Mask
+from .group import GroupBy
 from .ttypes import ALLOWED_TYPES, MAX_STRING_LEN_NUMPY, MAX_STRING_DATE_LEN_NUMPY, \
-                    getH5TypeStr
+                    NULL_VALUES, getH5TypeStr, getType, getTypeConverter
 from .helpers import split_line, is_iterable, read_tab_file
 from .required import H5_ON
 from .plot import plotxy
@@ -33,6 +36,7 @@ from .plot import plotxy
 
 import sys
 import inspect
+from itertools import compress, repeat, zip_longest
 from typing import List, Union, Callable
 
 # TODO: change desc to attr as for Column
@@ -42,6 +46,7 @@ from typing import List, Union, Callable
 class Table:
     """ Class to store a table as a collection of Columns. 
     """
+    __slots__ = ("name", "cols", "max_rows", "desc", "_indexes", "_names")
     
     def __init__(self, name):
         self.name = name
@@ -53,13 +58,19 @@ class Table:
         """
         
         self.cols = []
-        """ List of columns in this table. It should be safe to access it directly for reading. """
+        """ List of columns in this table. It should be safe to access it directly for reading. 
+            To change columns, use methods of this table (e.g. add, pop, remove, rename), 
+            so that positions of columns by name are kept up to date.
+        """
         
         self.max_rows = -1
         """ Max. number of rows in this table. """
         
         self.desc = None  
         """ Additional description that may be useful to identify data, e.g. origin, source, etc. """
+        
+        self._indexes = None                    # hash indexes of columns (see buildHashIndex)
+        self._names = None                      # {NAME: position of first column with that name} (see __position)
     
     
     def add(self, name: str = None, data = None, allowRepetition = False):
@@ -77,10 +88,10 @@ class Table:
         """
         name = name if name else "col%02d"%len(self.cols)
         
-        if self.has(name) and not allowRepetition:
-            assert False, "name is already in table: " + name
+        if not allowRepetition:
+            assert self.__position(name) is None, "name is already in table: " + name
         
-        if data and (isinstance(data, Column)): # and data == None:
+        if isinstance(data, Column):
             self.cols.append(data)  
         elif data:
             c = Column(name)
@@ -90,6 +101,9 @@ class Table:
             c = Column(name)
             self.cols.append(c)
         
+        if self._names is not None:
+            self._names.setdefault(self.cols[-1].name.upper(), len(self.cols) - 1)
+        
         if data:
             self.max_rows = self.max_rows if (self.max_rows >= len(data)) else len(data)
         
@@ -116,6 +130,7 @@ class Table:
         
         if self.has("id"): self.pop("id")
         self.cols = [c] + self.cols
+        self._names = None
         
         return self
         
@@ -141,7 +156,8 @@ class Table:
                 This table with appended values.
             
             **Note:** If you need to get a new table by merging this and other, 
-                      clone this table first and then append other.
+                      clone this table first and then append other, or use concat,
+                      which also matches columns by name.
         """
         assert (isinstance(other,Table))
         assert len(self) == len(other)
@@ -149,7 +165,7 @@ class Table:
         for i in range(len(self)):
             ic = self.cols[i]
             oc = other.cols[i]
-            ic.addData(oc.data)   # type is checked internally
+            ic.addData(oc)        # type is checked internally
         
         self.__setMaxRows()
         return self
@@ -169,24 +185,90 @@ class Table:
         cols_ = []
         for k in keys:
             c = self.__getitem__(k)
-            if c:
+            if c is not None:
                 cols_.append(c)
             else:
                 print("WARNING - Key is not present in table: " + str(k))
         return cols_
 
    
+    def asofJoin(self, other, on: Union[int,str], tolerance = None, suffix: str = "_right"):
+        """ Joins each row of this table (left) with the last row of other table (right) with 
+            key lower than or equal to the key of the left row, e.g. the latest rain reading 
+            at or before each level reading.
+            
+            Args:
+                other: right table.
+                on: name or position of key columns in both tables, e.g. "date".
+                tolerance: if present, maximum difference between keys of matched rows, 
+                           e.g. timedelta(hours = 1) for dates.
+                suffix: added to names of columns of right table that are also in left table.
+            
+            Returns:
+                A new table with all rows and columns of the left table plus the columns of the right table,
+                including its key column (named key + suffix). Rows without match have nulls in the columns 
+                of the right table.
+            
+            NOTE: Keys are matched by scanning both sorted key columns at once, so cost is O(n + m) if 
+                  both columns are sorted (see Column.isSorted). Otherwise, key columns are sorted first.
+        """
+        lkey, rkey = self[on], other[on]
+        assert lkey is not None and rkey is not None, "Key column must be in both tables"
+        
+        order = range(len(lkey)) if lkey.isSorted() else lkey.argsort()
+        keys, perm = rkey.buildIndex()._cache["index"]           # sorted valid keys of right table
+        lvalid = lkey._valid
+        ldata = lkey.data
+        ri = [None] * len(lkey)
+        j, m = 0, len(keys)
+        for i in order:
+            if lvalid is not None and not lvalid[i]: continue    # null keys never match
+            v = ldata[i]
+            while j < m and keys[j] <= v: j += 1
+            if j > 0 and (tolerance is None or v - keys[j - 1] <= tolerance):
+                ri[i] = j - 1 if perm is None else perm[j - 1]
+        
+        t = Table(self.name + "__asof__" + other.name)
+        for c in self.cols:
+            t.add(c.name, c.clone(), allowRepetition = True)        # copy-on-write
+        for c in other.cols:
+            nc = c._take(ri)
+            if self.has(nc.name): nc.name = nc.name + suffix
+            t.add(nc.name, nc, allowRepetition = True)
+        return t
+    
+    
+    def buildHashIndex(self, cols: List[Union[int,str]]):
+        """ Builds a hash index that maps keys (tuples with the elements of cols in a row) to 
+            the positions of the rows with that key. Then, lookup finds rows in O(1) average time.
+            
+            Args:
+                cols: list of names or positions of the columns that form the key, e.g. ["station", "date"].
+            
+            Returns:
+                This table.
+            
+            NOTE: The index is rebuilt when it is used after any of its columns has been modified.
+                  Joins and group-bys on the same columns use the index if it is present.
+        """
+        self._hashIndex(cols, build = True)
+        return self
+    
+    
     def clone(self, shallow = False, newName = None):
         """ Creates a shallow or deep copy of this table.
             
             Args:
                 shallow: if True, only pass references to columns in this table to new
-                         table. If False, then creates a deep copy, so that this table
-                         and new table do not share information. DEFAULT: False
+                         table. If False, then clones each column (see Column.clone), so that 
+                         changes made to one table are not seen by the other one. DEFAULT: False
                 newName: if present, then use it as title of new table.
             
             Returns:
                 New table.
+            
+            NOTE: Cloned columns share data until they are modified (copy-on-write), so only the 
+                  columns that are modified later, e.g. by calling map or convert, are copied.
         """
         newName = self.name + "(Copy)" if not newName else newName 
         t = Table(newName)
@@ -196,34 +278,46 @@ class Table:
         return t
 
     
-    def collect(self, func):
+    def collect(self, func, cols: List[Union[int,str]] = None, batch = False):
         """ Collects elements from this Table that satisfies a filter criterium. 
         
             Args:
-                func: filter, function-like with signature func(row, col, elem) -> Boolean
+                func: filter, function-like with signature func(row, col, elem) -> Boolean.
+                      If batch is True, the signature is func(col, column) -> Mask or list of Booleans, 
+                      e.g. func = lambda j, c: c > 40.
+                cols: list of names or positions of the columns that are scanned. 
+                      [OPTIONAL, DEFAULT = all columns]
+                batch: if True, func is called once per column with the whole column.
             
             Returns: 
                 A list with elements of this Table that pass the filter. 
-                The elements are ordered first by column.
+                The elements are ordered first by column. Nulls are None (also for func).
                 
         """
         col = []
         nrows = self.nrows()
-        ncols = self.ncols()
-        for c in range(ncols):
+        for c in self.__positions(cols):
+            if batch:
+                mask = Mask.of(func(c, self.cols[c]))
+                col.extend(compress(self.cols[c], mask))       # nulls are None, as in collectrc
+                continue
             for r in range(nrows):
-                e = self.cols[c].data[r]
+                e = self.cols[c][r]                 # nulls are None
                 if func(r, c, e): col.append(e)
         
         return col
         
     
-    def collectrc(self, func):
+    def collectrc(self, func, cols: List[Union[int,str]] = None, batch = False):
         """ Collects elements from this Table that satisfies a filter criterium. 
             Similar to collect but it also returns the row and column.
         
             Args:
-                func: filter, function-like with signature func(row, col, elem) -> Boolean
+                func: filter, function-like with signature func(row, col, elem) -> Boolean.
+                      If batch is True, the signature is func(col, column) -> Mask or list of Booleans.
+                cols: list of names or positions of the columns that are scanned. 
+                      [OPTIONAL, DEFAULT = all columns]
+                batch: if True, func is called once per column with the whole column.
             
             Returns: 
                 A list of tuples (row,col,elem) with elements of this Table that pass the filter. 
@@ -231,8 +325,11 @@ class Table:
         """
         col = []
         nrows = self.nrows()
-        ncols = self.ncols()
-        for c in range(ncols):
+        for c in self.__positions(cols):
+            if batch:
+                mask = Mask.of(func(c, self.cols[c]))
+                col.extend((r, c, self.cols[c][r]) for r in compress(range(len(mask)), mask))
+                continue
             for r in range(nrows):
                 e = self.cols[c][r]
                 if func(r, c, e):
@@ -242,6 +339,72 @@ class Table:
         return col
         
     
+    @staticmethod
+    def concat(tables, name: str = None):
+        """ Creates a new table with the rows of all tables, one table after the other.
+            Columns are matched by name (case insensitive), so tables do not need to have
+            the same columns or the same order of columns.
+            
+            Args:
+                tables: list of tables.
+                name: name of new table [OPTIONAL, DEFAULT = name of first table].
+            
+            Returns:
+                A new table with one column for each different name, in the order in which
+                names are first found. Rows of a table without a column are nulls in that column.
+            
+            NOTE: Columns with the same name must have the same type. Format and attributes
+                  are taken from the first table that has the column.
+                  Schemas are checked once and each column is allocated with its final length, so
+                  concatenating many tables is linear in the total number of rows (see append).
+        """
+        tables = list(tables)
+        assert all(isinstance(t, Table) for t in tables), "All elements must be tables"
+        
+        schema, sizes = {}, []                  # {NAME: columns with that name in each table}, rows of each table
+        for k, t in enumerate(tables):
+            for c in t.cols:
+                found = schema.get(c.name.upper())
+                if found is None: found = schema[c.name.upper()] = [None] * len(tables)
+                if found[k] is not None: continue                   # repeated name, first one is used
+                found[k] = c
+            sizes.append(max((len(c) for c in t.cols), default = 0))
+        
+        total = sum(sizes)
+        nt = Table(name if name else (tables[0].name if tables else "concat"))
+        for found in schema.values():
+            cols = [c for c in found if c is not None]
+            types = {c.type for c in cols if c.type}
+            assert len(types) <= 1, "Types of column %s do not match: %s" % (cols[0].name, sorted(types))
+            ctype = types.pop() if types else None
+            
+            data = [NULL_VALUES[ctype] if ctype else None] * total
+            lengths = [len(c) if c is not None else 0 for c in found]
+            start = 0
+            for c, m, n in zip(found, lengths, sizes):
+                if m: data[start:start + m] = c.data
+                start += n
+            
+            valid = None                        # only built if there are nulls
+            if any(m < n for m, n in zip(lengths, sizes)) or any(c._valid is not None for c in cols):
+                valid = Bitmap()
+                for c, m, n in zip(found, lengths, sizes):
+                    if m: valid.extend(c._valid if c._valid is not None else Bitmap(m))
+                    if m < n: valid.extend(Bitmap(n - m, False))
+            
+            p = next(c for c in cols if c.type == ctype)            # first column with the type
+            c = p.like()
+            c.name = cols[0].name
+            if c.type is None and ctype: c.type, (c.tostr, c.fmt) = ctype, getTypeConverter(ctype, "s", c.fmt)
+            c.data = data
+            c._valid = valid
+            if p._attrs is not None: c._attrs = dict(p._attrs)
+            nt.cols.append(c)
+        
+        nt.max_rows = total if schema else -1
+        return nt
+    
+    
     @staticmethod
     def fromH5(src, root = None, verbose = False):
         """ Reads table from HDF5 file saved by calling toH5 or with a similar format.
@@ -271,8 +434,10 @@ class Table:
             print("   Saved on: " + date)
         
         t = Table(name)
+        nulls = g["__nulls__"] if "__nulls__" in g else None
         for name in g:
             #print(name)       # DEBUG
+            if name == "__nulls__": continue
             ds = h5[root + "/" + name]
             id = name
             nvals = len(ds)
@@ -281,17 +446,44 @@ class Table:
             
             # Check if it creates too many temporaries
             a = ds[:]
-            if "S" in dtype:            # strings are passed as raw binary, need to decode
+            if "categories" in ds.attrs:   # categorical column, saved as codes
+                cats = [e.decode("utf-8") if isinstance(e, bytes) else e for e in ds.attrs["categories"]]
+                data = Categorical.fromCodes(a.tolist(), cats)
+            elif "packed" in ds.attrs:      # strings saved without truncation
+                data = PackedStrings([e.decode("utf-8") if isinstance(e, bytes) else e for e in a])
+            elif "S" in dtype:            # strings are passed as raw binary, need to decode
                 data = [e.decode("utf-8") for e in a]
             else:
                 data = a.tolist()
             t.add(id, data)
+            if nulls and name in nulls:
+                t.cols[-1]._valid = Bitmap.fromBytes(nulls[name][:].tobytes(), nvals)
             
         h5.close()
         if verbose: print("   Finished reading table")
         return t, src
         
         
+    def groupby(self, keys: List[Union[int,str]]):
+        """ Groups rows of this table by the values in key columns, e.g.
+            ```
+                s = t.groupby(["station"]).agg({"WL": ["mean", "min", "max", "count"]})
+            ```
+            
+            Args:
+                keys: list of names or positions of key columns, or a single name.
+            
+            Returns:
+                A GroupBy object (see group.GroupBy) to aggregate other columns.
+            
+            NOTE: Rows are grouped in a single pass using a dictionary, or the hash index of keys 
+                  if it exists (see buildHashIndex). Groups of a single categorical column 
+                  (see Column.encode) are found by comparing only integer codes.
+        """
+        keys = [keys] if isinstance(keys, (str, int)) else keys
+        return GroupBy(self, keys)
+    
+    
     def has(self, key):
         """ Given a key returns True if it is in list of columns. 
             
@@ -311,8 +503,7 @@ class Table:
             return (key >= 0 and key < len(self.cols))
             
         elif (isinstance(key, str)):
-            ids = self.names(case = "L")
-            return key.lower() in ids
+            return self.__position(key) is not None
             
         else:
             assert False, "Unknown type for key: " + str(key)
@@ -353,18 +544,13 @@ class Table:
         """
         assert is_iterable(names)
         
-        # maybe optimize later if needed, create list at insertion of column
-        ids = self.names(case = "U")
-        #print(ids)                 # DEBUG
         pos = []
         for k in names:
-            key = k.upper()
-            #print(key)            # DEBUG
-            if key in ids:   
-                idx = ids.index(key)
+            idx = self.__position(k)
+            if idx is not None:   
                 pos.append(idx)
             elif verbose:
-                print(" WARNING: Key is not in Table. [key - %s]"%(key))
+                print(" WARNING: Key is not in Table. [key - %s]"%(k.upper()))
             else:
                 pass   
         return pos
@@ -379,13 +565,43 @@ class Table:
                 if len(c) != n: return False
         return True
 
-# TODO       
-#    def filter(self, col, func):
-#        """ Returns a subtable of this table created by filtering all rows that do not satisfy the filtering criteria.
-#            
-#            Args:
-#                col: position of column that will be considered to apply the filter func. 
-#        """
+    
+    def filter(self, predicate, cols: List[Union[int,str]] = None):
+        """ Returns a new table with the rows of this table that satisfy predicate.
+            
+            Args:
+                predicate: Mask or list of booleans with one element per row, e.g.
+                               mask = (t["depth"] > 10.0) & (t["temp"] < 4.0)
+                           or function with signature predicate(i, row) -> Boolean, where
+                           row is a tuple with the elements of the columns in cols, e.g.
+                               t.filter(lambda i, r: r[0] > 10.0 and r[1] < 4.0, cols = ["depth", "temp"])
+                cols: list of names or positions of columns passed to predicate.
+                      [OPTIONAL, DEFAULT = all columns]
+            
+            Returns:
+                A new table with copies of the selected rows. Each column is gathered
+                once and it keeps its name, format, attributes and nulls.
+            
+            NOTE: predicate is called once per row and it only receives the columns in cols, 
+                  so passing only the columns that are needed makes filtering much faster 
+                  for wide tables. Nulls are passed as None.
+        """
+        assert self.isSquare(), "Rows can only be filtered in square tables"
+        if callable(predicate):
+            sel = self.at(cols) if cols is not None else self.cols
+            assert cols is None or len(sel) == len(cols), "Some columns are not present in table"
+            nrows = len(self.cols[0]) if self.cols else 0
+            mask = Mask.fromBools(map(predicate, range(nrows), zip(*sel)))
+        else:
+            mask = Mask.of(predicate)
+        assert not self.cols or len(mask) == len(self.cols[0]), "Mask must have one element per row"
+        
+        t = Table(self.name)
+        t.desc = self.desc
+        for c in self.cols:
+            t.add(c.name, c._gather(mask), allowRepetition = True)
+        return t
+    
     
     def names(self, case = "M"):
         """ Returns a list with ids (names) of columns in this table. Depending on
@@ -416,24 +632,108 @@ class Table:
         return self.max_rows
 
     
-    def map(self, func):
+    def join(self, other, on, how: str = "inner", suffix: str = "_right"):
+        """ Joins rows of this table (left) with rows of other table (right) that have the same key.
+            
+            Args:
+                other: right table.
+                on: name or position, or list of names or positions, of key columns present in both tables.
+                how: "inner" (only rows with matches), "left" (all rows of left table) or 
+                     "outer" (all rows of both tables). Missing values are nulls.
+                suffix: added to names of columns of right table that are also in left table.
+            
+            Returns:
+                A new table with the key columns, the other columns of the left table and 
+                the other columns of the right table.
+            
+            NOTE: If both key columns are known to be sorted (see Column.isSorted) and have no nulls, 
+                  then rows are matched by merging both columns (sort-merge join) and the result 
+                  is sorted by key. Otherwise, a hash index of the right table is used (see buildHashIndex),
+                  and rows are in the order of the left table, followed by unmatched rows of the right table 
+                  for outer joins. Rows with null keys never match.
+        """
+        assert how in ("inner", "left", "outer"), "Unknown type of join: " + how
+        on = [on] if isinstance(on, (str, int)) else on
+        lpos, rpos = self.__positions(on), other.__positions(on)     # asserts that keys are in both tables
+        lkeys, rkeys = [self.cols[p] for p in lpos], [other.cols[p] for p in rpos]
+        
+        merge = len(on) == 1 and all(c._sorted == 1 and c._valid is None for c in lkeys + rkeys)
+        if merge:
+            li, ri = self.__mergeJoin(lkeys[0], rkeys[0], how)
+        else:
+            li, ri = self.__hashJoin(other, on, lkeys, rkeys, how)
+        
+        t = Table(self.name + "__join__" + other.name)
+        kpos = dict(zip(lpos, rkeys))                     # position of left key -> right key
+        for p, c in enumerate(self.cols):
+            nc = c._take(li)
+            if p in kpos and how == "outer":           # take keys of right rows without match
+                rc = kpos[p]
+                vals = [e if i is not None else rc[j] for e, i, j in zip(nc, li, ri)]
+                nc = c.like()
+                if c._attrs is not None: nc._attrs = dict(c._attrs)
+                nc.addData(vals)
+            elif p in kpos and merge and how != "outer":
+                nc._sorted = 1
+            t.add(nc.name, nc, allowRepetition = True)
+        
+        rpos = set(rpos)
+        for p, c in enumerate(other.cols):
+            if p in rpos: continue
+            nc = c._take(ri)
+            if self.has(nc.name): nc.name = nc.name + suffix
+            t.add(nc.name, nc, allowRepetition = True)
+        return t
+    
+    
+    def lookup(self, key, cols: List[Union[int,str]] = None, copy = False):
+        """ Finds all rows with a given key using a hash index (see buildHashIndex).
+            
+            Args:
+                key: tuple with one element for each column in the index, 
+                     or a single value if the index has only one column.
+                cols: name or position, or list of names or positions, of the columns of the index.
+                      [OPTIONAL if only one index has been built]
+                copy: if True, returns a new table with copies of the rows (see take).
+            
+            Returns:
+                List of positions of the rows that match key (empty if key is not present), 
+                e.g. to be used with rows or take. If copy is True, a new table with those rows, 
+                so changes to it are not seen in this table.
+        """
+        if cols is None:
+            assert self._indexes and len(self._indexes) == 1, "Specify columns of the index"
+            cols = next(iter(self._indexes))
+        index = self._hashIndex(cols, build = True)
+        key = key if isinstance(key, tuple) else (key,)
+        idxs = index.get(key, [])
+        return self.take(idxs) if copy else list(idxs)
+    
+    
+    def map(self, func, cols: List[Union[int,str]] = None, batch = False):
         """ Changes values of elements in this Table by mapping a function.
             After calling this method, values in this Table may have changed.
         
             Args:
-                func: a function-like object with signature func(row, col, elem) -> value 
+                func: a function-like object with signature func(row, col, elem) -> value.
+                      Nulls are passed as None and values equal to None are stored as nulls.
+                      If batch is True, the signature is func(col, column) -> list or Column 
+                      with the new values of the column, e.g. func = lambda j, c: c * 1.8 + 32.0.
+                      Type of the column is set from the new values, e.g. float if some are floats.
+                cols: list of names or positions of the columns that are changed. 
+                      [OPTIONAL, DEFAULT = all columns]
+                batch: if True, func is called once per column with the whole column.
             
             Returns:
                 this Table.
         """
-        col = []
-        nrows = self.nrows()
-        ncols = self.ncols()
-        for c in range(ncols):
-            for r in range(nrows):
-                e = self.cols[c].data[r]
-                val = func(r, c, e)
-                self.cols[c].data[r] = val
+        for c in self.__positions(cols):
+            col = self.cols[c]
+            col._touch()
+            if batch:
+                self.__setData(c, func(c, col))
+            else:                                   # type and nulls are set as in batch mode
+                self.__setData(c, [func(r, c, e) for r, e in enumerate(col)])
         
         desc = inspect.getsource(func).strip()
         self.name = self.name + "__" + desc
@@ -508,6 +808,7 @@ class Table:
             else:
                 c1 = c.convert(nt) # using the default format
             self.cols[idx] = c1
+        self._names = None
         
         return self
 
@@ -527,7 +828,7 @@ class Table:
                 columnWidth: default width used to print columns. 
                              There is no guarantee that the formats used to print
                              elements of column fit withing this width.                              
-                missing: string used to represent missing values in table. DEFAULT: "-"
+                missing: string used to represent missing values (nulls) in table. DEFAULT: "-"
                 verbose: if True, then prints some additional information to sys.stdout.
                 start: start printing at this row.
                 lineBelow: if True, prints a line below column headers.
@@ -553,7 +854,7 @@ class Table:
         nrows = maxRows if (maxRows > 0 and self.max_rows > maxRows) else self.max_rows 
         for r in range(start, nrows):
             for c in self.cols:
-                if len(c) >r:
+                if len(c) > r and not c.isNull(r):
                     s = c.format(r)
                     out.write(_fmt%s)
                 else:
@@ -608,11 +909,12 @@ class Table:
         if self.has(key):
             if isinstance(key, int):
                 c = self.cols.pop(key)
+                self._names = None
                 return c
                 
             elif isinstance(key, str):
-                idx = self.index([key])    # OPTIMIZE LATER, LIST CREATION
-                c = self.cols.pop(idx[0])
+                c = self.cols.pop(self.__position(key))
+                self._names = None
                 return c
         return None
 
@@ -633,6 +935,7 @@ class Table:
         for i in range(len(old_idx)):
             o = old_idx[i]
             self.cols[o].name = values[i]
+        self._names = None
         
         return self
         
@@ -662,13 +965,14 @@ class Table:
             #assert self.has(idx), "Column[%d] not in table."%(idx)
             c = self.cols.pop(idx)
             removed.append(c)
+        self._names = None
         
         return removed
         
     
     @staticmethod
     def read(src: str, sep: str=",", header=1, removeEmptyColumn=True, \
-             verbose=True, encoding: str = "utf-8", allowRepetition = True, skip = 0):
+             verbose=True, encoding: str = "utf-8", allowRepetition = True, skip = 0, maxCategories = 0):
         """ Reads table from file.
             
             Args:
@@ -684,6 +988,8 @@ class Table:
                 allowRepetition: if True, allows columns with same header id.
                 skip: number of lines at beginning of file that should be skipped, 
                       e.g. comment lines [DEFAULT = 0]. 
+                maxCategories: if > 0, columns with at most this number of unique strings are
+                               stored as categorical columns (see Column.encode) [DEFAULT = 0].
                 
             Returns:
                 A new table with data read from file and a list with skipped lines. 
@@ -717,6 +1023,15 @@ class Table:
             for c in range(ncols - 1, -1, -1):
                 col = t.cols[c]
                 if col.isBlank(): t.pop(c)
+        
+        if maxCategories > 0:
+            for col in t.cols:
+                uniques = set()
+                for e in col.data:                  # stop as soon as there are too many strings
+                    uniques.add(e)
+                    if len(uniques) > maxCategories: break
+                else:
+                    col.data = Categorical(col.data)
                 
         t.__setMaxRows()
         
@@ -773,7 +1088,7 @@ class Table:
                 columnWidth: default width used to print columns. 
                              There is no guarantee that the formats used to print
                              elements of column fit withing this width.                              
-                missing: string used to represent missing values in table. DEFAULT: "-"
+                missing: string used to represent missing values (nulls) in table. DEFAULT: "-"
                 verbose: if True, then prints some additional information to sys.stdout.
         """
         if verbose:
@@ -795,8 +1110,8 @@ class Table:
             Returns:
                 A new table that contains the columns of this table for which filter == True.
 
-            NOTE: Both tables share the same columns, so changes apply to one table 
-                  are also propagated to the other one.
+            NOTE: Columns of the new table are clones (see Column.clone), so data is only 
+                  copied if it is modified in one of the tables. Nulls are preserved.
         """
         source = inspect.getsource(filter)
         # #print(source)
@@ -806,7 +1121,7 @@ class Table:
         for i in range(len(self.cols)):
             c = self.cols[i]
             if filter(i, c.name):
-                sel.add(c.name, c.data)
+                sel.add(c.name, c.clone())
         return sel
     
      
@@ -823,22 +1138,44 @@ class Table:
         return self
     
     
-    def subtable(self, func):
+    def slice(self, start: int = None, stop: int = None):
+        """ Creates a new table with rows in range(start, stop) of this table.
+            
+            Args:
+                start: first row of new table [OPTIONAL, DEFAULT = 0].
+                stop: row after the last row of new table [OPTIONAL, DEFAULT = number of rows].
+            
+            Returns:
+                A new table with views of the columns of this table (see Column.view).
+                
+            NOTE: Data is not copied, so it is cheap to create many slices of a long table, 
+                  e.g. to analyze data in moving windows.
+        """
+        t = Table(self.name)
+        t.desc = self.desc
+        for c in self.cols:
+            t.add(c.name, c.view(start, stop), allowRepetition = True)
+        return t
+    
+    
+    def subtable(self, func, cols: List[Union[int,str]] = None, batch = False):
         """ Creates a subtable based on a filter criterium defined by func.
         
             Args:
-                func: function-like object with signature func(row, col, elem) -> Boolean
+                func: function-like object with signature func(row, col, elem) -> Boolean.
+                      If batch is True, the signature is func(col, column) -> Mask or list of Booleans.
+                cols: list of names or positions of the columns that are scanned. 
+                      [OPTIONAL, DEFAULT = all columns]
+                batch: if True, func is called once per column with the whole column.
             
             Returns:
                 A new Table with only rows and columns that have at least one 
                 triplet (row, col, elem) that satisfies the filter function.
         """
-        idxs = self.collectrc(func)
+        idxs = self.collectrc(func, cols = cols, batch = batch)
         row, col, elem = zip(*idxs)
-        row = set(sorted(row))
-        col = set(sorted(col))
-        row = list(row)
-        col = list(col)
+        row = sorted(set(row))
+        col = sorted(set(col))
         
         desc = inspect.getsource(func).strip()
         t = Table(self.name + "__subtable: " + desc)
@@ -854,40 +1191,73 @@ class Table:
             t.add(cname, data)
             t.cols[j].fmt   = self.cols[c].fmt
             t.cols[j].tostr = self.cols[c].tostr
-            t.cols[j].attrs = self.cols[c].attrs
+            t.cols[j].attrs = self.cols[c]._attrs
                 
         return t
         
         
-    def sort(self, key, reverse = False):
-        """ Sort rows of table according to key in ascending order.
+    def sort(self, key = None, reverse = False, by: List[Union[int,str]] = None, ascending = True):
+        """ Sort rows of table according to key or to the values in columns by.
         
             Args:
                 key: function that takes a row of the column and returns a single value, e.g.
                      key (row) -> row[0]
-                reverse: if True, sort table in descending order.
+                reverse: if True, sort table in descending order (only used with key).
+                by: list of names or positions of columns used to sort rows, e.g. ["station", "date"].
+                    Rows are sorted by the first column, then by the second one, etc.
+                ascending: True, False or a list with one boolean for each column in by.
         
             Returns:
                 This table with rows sorted by key.
+            
+            NOTE: Sorting is stable. Only one permutation of rows is computed, which is then used 
+                  to rearrange each column at once. Sorting with by is faster than with key, since rows 
+                  are never created. Nulls are placed after all other values.
+                  If columns have different lengths, then shorter columns are filled with nulls.
         """
+        assert (key is None) != (by is None), "Pass either key or by"
         self.__setMaxRows()
-        assert self.isSquare(), "Only implemented for square tables"
-        
-        rows = []
-        for i in range(self.max_rows):
-            r = self.row(i)
-            rows.append(r)
-        
-        nrows = sorted(rows, key = key, reverse=reverse)
-        for i in range(len(nrows)):
-            row = nrows[i]
-            for j in range(len(self.cols)):
-                r = row[j]
-                #print("(%d,%d)"%(i,j))         #DEBUG
-                self.cols[j].data[i] = r
+        nrows = max(self.max_rows, 0)
+        for c in self.cols:
+            if len(c) < nrows:
+                assert c.type, "Cannot fill column without type with nulls: " + c.name
+                c.addData([None] * (nrows - len(c)))
+        
+        if key is not None:
+            rows = list(zip(*self.cols))
+            perm = sorted(range(nrows), key = lambda i: key(rows[i]), reverse = reverse)
+        else:
+            pos = self.__positions(by)
+            ascending = ascending if is_iterable(ascending) else [ascending] * len(pos)
+            assert len(ascending) == len(pos), "ascending must have one element for each column in by"
+            perm = list(range(nrows))
+            for p, asc in reversed(list(zip(pos, ascending))):    # stable sorts from last to first key
+                perm.sort(key = self.cols[p]._sortKeys(nullsLast = asc).__getitem__, reverse = not asc)
+        
+        for c in self.cols:
+            s = c._take(perm)
+            c.data, c._valid, c._shared = s.data, s._valid, False
+            c._touch()
+        if by is not None: self.cols[pos[0]]._sorted = 1 if ascending[0] else -1
         return self
     
     
+    def take(self, idxs):
+        """ Creates a new table with the rows at positions idxs of this table.
+            
+            Args:
+                idxs: list of positions of rows, e.g. returned by Column.between.
+            
+            Returns:
+                A new table with copies of the rows. Columns keep their name, format, attributes and nulls.
+        """
+        t = Table(self.name)
+        t.desc = self.desc
+        for c in self.cols:
+            t.add(c.name, c._take(idxs), allowRepetition = True)
+        return t
+    
+    
     def tail(self, n = 5):
         """ Prints last n rows with default formatting.
             
@@ -931,12 +1301,19 @@ class Table:
                 Full path to saved HDF5 file.
             
             NOTE: Dates are converted to string using default format specified in setFormatStr.
+                  Categorical columns (see Column.encode) are saved as integer codes with the 
+                  list of unique strings as the attribute "categories" of the dataset.
+                  Packed columns (see Column.pack) are saved as variable length strings, 
+                  so they are not truncated.
+                  Nulls are saved as placeholders (NaN for floats) and the bitmap of valid elements 
+                  of each column with nulls is saved in the group "__nulls__".
         """
         # TODO: Add attributes for columns
         from datetime import datetime as dt
         import os
         assert H5_ON, "h5py is not available"
         import h5py
+        import numpy as np
         
         if verbose:
             print("WARNING<Table.toH5>: Strings are limited to %d characters"%(MAX_STRING_LEN_NUMPY))
@@ -954,7 +1331,14 @@ class Table:
             # avoid problems when finding the correct path
             c.name = c.name.replace("/","_")
             #print("COLUMN NAME: " + c.name)  # DEBUG
-            dtype = getH5TypeStr(c.type)
+            categorical = isinstance(c.data, Categorical)
+            packed = isinstance(c.data, PackedStrings)
+            if categorical:
+                dtype = "i4"
+            elif packed:
+                dtype = h5py.string_dtype("utf-8")
+            else:
+                dtype = getH5TypeStr(c.type)
             nelem = len(c)
             
             if verbose: print("Dataset<%s> - type<%s> - nelem<%d>"%(c.name, dtype, nelem))
@@ -963,6 +1347,19 @@ class Table:
             else:
                 dset = g.create_dataset(c.name, (nelem), dtype=dtype)
                 
+            if c.nnulls() > 0:              # save bitmap of valid elements, 1 bit per element
+                ng = g.require_group("__nulls__")
+                ng.create_dataset(c.name, data = np.frombuffer(bytes(c._valid.bits), dtype = "u1"))
+            
+            if categorical:                 # save codes and list of unique strings
+                dset.attrs["categories"] = c.data.categories
+                dset[:] = c.data.codes
+                continue
+            elif packed:                    # save as variable length strings
+                dset.attrs["packed"] = 1
+                dset[:] = list(c.data)
+                continue
+            
             if c.type == "d":
                 assert fmt_date, "Missing format to convert to date"
                 cc = c.clone()    
@@ -983,24 +1380,37 @@ class Table:
             and columns >=2 are equal to the rows 1..n of the old table.
             
             All data is copied to the new table.
-            To make columns consistant, all columns are first converted to strings.
+            If columns 2..n of this table have the same type, then the new columns keep that type
+            (and format). Otherwise, to make columns consistent, elements are converted to strings.
+            
+            NOTE: All columns are built in one pass over the rows and names of new columns are 
+                  not checked, since they may be repeated (see uniques). 
+                  Missing elements of shorter columns are nulls.
         """
         nt = Table("Transpose__" + self.name)
-        c0 = [c.name for c in self.cols]
-        nt.add(name=c0[0], data = c0[1:])
-        
-        for r in range(self.nrows()):
-            row = self.row(r)
-            row = [str(e) for e in row]
-            nt.add(name = row[0], data = row[1:], allowRepetition = True)
-        
+        if not self.cols: return nt
+        
+        c0, cols = self.cols[0], self.cols[1:]
+        nt.cols.append(Column(c0.name).addData([c.name for c in cols]))
+        
+        types = {c.type for c in cols if c.type}
+        p = next((c for c in cols if c.type), None)
+        same = len(types) <= 1 and all(c.fmt == p.fmt for c in cols if c.type)
+        for row in zip_longest(*self.cols):
+            c = Column(str(row[0]))
+            if same and p is not None: c.type, c.fmt, c.tostr = p.type, p.fmt, p.tostr
+            values = row[1:] if same else [str(e) if e is not None else None for e in row[1:]]
+            c.addData(values, ctype = "s")
+            nt.cols.append(c)
+        
+        nt.max_rows = len(cols)
         return nt
         
     
     def uniques(self):
         """ Generates a new table by removing columns that have the same name.
             Only first column with a given name is preserved.
-            Data in columns included in new table is NOT copied.
+            Data in columns included in new table is NOT copied (see Column.clone).
             
             Returns:
                 a new table with columns that have different names.
@@ -1008,7 +1418,7 @@ class Table:
         t = Table("UniqueIDS__" + self.name)
         for c in self.cols:
             if c.name not in t:
-                t.add(c.name, c.data)
+                t.add(c.name, c.clone())
         return t
         
     
@@ -1057,6 +1467,161 @@ class Table:
         return self.what(out)
         
         
+    def __position(self, name: str):
+        """ To be called internally to get the position of the first column with name 
+            (case insensitive) or None if it is not present. It uses a map from names to positions 
+            that is updated by add and reset by methods that remove, replace or rename columns.
+            A position found in the map is also checked against the name of the column at that position.
+        """
+        names, cols, key = self._names, self.cols, name.upper()
+        if names is not None:
+            p = names.get(key)
+            if p is None or (p < len(cols) and cols[p].name.upper() == key): return p
+        
+        names = self._names = {}
+        for i, c in enumerate(cols): names.setdefault(c.name.upper(), i)
+        return names.get(key)
+    
+    
+    def _hashIndex(self, cols, build = False):
+        """ To be called internally to get the hash index of cols (see buildHashIndex).
+            Returns None if the index does not exist or it is outdated, unless build is True.
+        """
+        cols = [cols] if isinstance(cols, (str, int)) else cols
+        pos = tuple(self.__positions(cols))
+        sel = [self.cols[p] for p in pos]
+        versions = tuple(c._version for c in sel)
+        entry = self._indexes.get(pos) if self._indexes else None
+        if entry and all(a is b for a, b in zip(entry[0], sel)) and entry[1] == versions:
+            return entry[2]
+        if not build: return None
+        
+        index = self.__indexRows(sel)
+        if self._indexes is None: self._indexes = {}
+        self._indexes[pos] = (sel, versions, index)
+        return index
+    
+    
+    @staticmethod
+    def __indexRows(cols):
+        """ To be called internally to map each key of cols to the list of positions of its rows.
+        """
+        index = {}
+        for i, key in enumerate(zip(*cols)):
+            rows = index.get(key)
+            if rows is None: 
+                index[key] = [i]
+            else:
+                rows.append(i)
+        return index
+    
+    
+    def __hashJoin(self, other, on, lkeys, rkeys, how):
+        """ To be called internally to match rows of a join using a hash index of other table.
+            Returns lists of positions of matched rows in both tables (None if there is no match).
+            NOTE: An up to date index of other (see buildHashIndex) is reused, otherwise a temporary 
+                one is built only for this join.
+        """
+        index = other._hashIndex(on)
+        if index is None: index = self.__indexRows(rkeys)
+        li, ri = [], []
+        matched = bytearray(len(other.cols[0]) if other.cols else 0) if how == "outer" else None
+        for i, key in enumerate(zip(*lkeys)):
+            rows = index.get(key) if None not in key else None
+            if rows:
+                li.extend(repeat(i, len(rows)))
+                ri.extend(rows)
+                if matched is not None:
+                    for j in rows: matched[j] = 1
+            elif how != "inner":
+                li.append(i)
+                ri.append(None)
+        if matched is not None:
+            for j in range(len(matched)):
+                if not matched[j]:
+                    li.append(None)
+                    ri.append(j)
+        return li, ri
+    
+    
+    def __mergeJoin(self, lkey, rkey, how):
+        """ To be called internally to match rows of a join by merging two sorted key columns.
+            Returns lists of positions of matched rows in both tables (None if there is no match).
+        """
+        a = lkey.data if isinstance(lkey.data, list) else list(lkey.data)
+        b = rkey.data if isinstance(rkey.data, list) else list(rkey.data)
+        n, m = len(a), len(b)
+        li, ri = [], []
+        i = j = 0
+        while i < n and j < m:
+            if a[i] < b[j]:
+                if how != "inner":
+                    li.append(i)
+                    ri.append(None)
+                i += 1
+            elif b[j] < a[i]:
+                if how == "outer":
+                    li.append(None)
+                    ri.append(j)
+                j += 1
+            else:                                      # runs of equal keys
+                v, i2, j2 = a[i], i + 1, j + 1
+                while i2 < n and a[i2] == v: i2 += 1
+                while j2 < m and b[j2] == v: j2 += 1
+                for x in range(i, i2):
+                    li.extend(repeat(x, j2 - j))
+                    ri.extend(range(j, j2))
+                i, j = i2, j2
+        if how != "inner":
+            li.extend(range(i, n))
+            ri.extend(repeat(None, n - i))
+        if how == "outer":
+            li.extend(repeat(None, m - j))
+            ri.extend(range(j, m))
+        return li, ri
+    
+    
+    def __positions(self, cols):
+        """ To be called internally to get positions of columns given a list of names or 
+            positions. If cols is None, returns positions of all columns.
+        """
+        if cols is None: return range(len(self.cols))
+        pos = []
+        for k in cols:
+            p = k if isinstance(k, int) else next(iter(self.index([k])), None)
+            assert p is not None and p < len(self.cols), "Key is not present in table: " + str(k)
+            pos.append(p)
+        return pos
+    
+    
+    def __setData(self, pos, data):
+        """ To be called internally to replace elements in column at position pos by data,
+            which can be a list or a Column, e.g. returned by Column operators.
+        """
+        c = self.cols[pos]
+        assert len(data) == len(c), "New data must have the same length as column: " + c.name
+        if isinstance(data, Column):
+            if data.type != c.type: c.type, c.tostr, c.fmt = data.type, data.tostr, data.fmt
+            c.data, c._valid = data.data, data._valid.copy() if data._valid is not None else None
+            data._shared = c._shared = True
+            return
+        
+        data = list(data)
+        types = {getType(e) for e in data if e is not None}
+        if types == {"i", "f"}:                 # e.g. x / 2 only for some rows
+            data, types = [float(e) if e is not None else None for e in data], {"f"}
+        assert len(types) <= 1, "Elements of %s must have the same type: %s"%(c.name, sorted(types))
+        ntype = types.pop() if types else c.type
+        
+        nc = Column(c.name)                     # type and nulls as in addData
+        nc.fmt = c.fmt if ntype == c.type else None
+        nc.addData(data, ctype = NULL_VALUES[ntype] if ntype else None)
+        if ntype == "s" and isinstance(c.data, (Categorical, PackedStrings)):
+            nc.data = type(c.data)(nc.data)     # keep encoding
+        c.data, c._valid, c._shared = nc.data, nc._valid, False
+        c.type, c.tostr, c.fmt = nc.type, nc.tostr, nc.fmt
+    
+    
     def __setMaxRows(self):
         """ To be called internally to set max number of rows in table.
         """
@@ -1159,12 +1724,11 @@ class Table:
         """
         assert not is_iterable(key), "Only single keys accepted"
         
-        if self.has(key):
-            if isinstance(key, int):
-                return self.cols[key]
-            elif isinstance(key, str):
-                idx = self.index([key])
-                return self.cols[idx[0]]
+        if isinstance(key, str):
+            idx = self.__position(key)
+            return self.cols[idx] if idx is not None else None
+        elif self.has(key):
+            return self.cols[key]
         else:
             None
     
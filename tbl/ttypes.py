@@ -29,11 +29,13 @@ __docformat__ = "google"
 
 from typing import TypeVar, Generic
 from datetime import datetime, date
+from functools import lru_cache
 
 ALLOWED_TYPES = ['i', 'f', 'd', 's']   # int, float, datetime, string
 MAX_STRING_LEN_NUMPY = 100             # IF CHANGED UPDATE BELOW TOO FOR s AND d
 MAX_STRING_DATE_LEN_NUMPY = 20         # IF CHANGED UPDATE BELOW TOO FOR s AND d
 NUMPY_TYPE = { 'i' : 'i8', 'f' : 'f8', 's' : 'S100', 'd' : 'S19'}
+NULL_VALUES = { 'i' : 0, 'f' : float("nan"), 's' : "", 'd' : datetime.min}   # placeholders for missing values
 
 
 def isTypeStr(stype: str) -> bool:
@@ -42,6 +44,7 @@ def isTypeStr(stype: str) -> bool:
     return stype in ALLOWED_TYPES
     
     
+@lru_cache(maxsize = None)
 def getTypeConverter(old: str, new: str, fmt: str = None):
     """ Returns a function used to convert data from old type to new type. 
         
@@ -54,6 +57,7 @@ def getTypeConverter(old: str, new: str, fmt: str = None):
             A tuple(f, fmt), where f: converter and  fmt is the format used to make conversion (string or None).
          
         NOTE: Only conversions from string to any type, and from any type to string are implemented. 
+              Converters are cached, so columns with the same type and format share the same converter.
     """
     assert isTypeStr(old), old
     assert isTypeStr(new), new 
@@ -229,10 +229,43 @@ def test21_longstr():
     print(s)
 
 def test22_stats():
+    import math
     c = Column("float").addData([0.0, 1.0, 2.0, 3.0])
     #c.tail()
     s = c.stats(verbose=True)
     assert len(s) == 5
+    assert s == (4, 0.0, 3.0, 1.5, math.sqrt(1.25))
+    assert c.stats(verbose=False) is s      # cached
+    
+    c.append(4.0)
+    s = c.stats(verbose=False)
+    assert s[0] == 5 and s[2] == 4.0 and s[3] == 2.0
+    c[0] = -1.0
+    assert c.stats(verbose=False)[1] == -1.0
+    c.map(lambda i, e: 2 * e)
+    assert c.stats(verbose=False)[2] == 8.0
+    
+    c = Column("ints").addData([1, 2, 3, None])
+    assert c.stats(verbose=False)[:4] == (3, 1, 3, 2.0)
+    c.convert("f")
+    assert c.stats(verbose=False)[0] == 3
+    
+    from datetime import datetime, timedelta
+    d0 = datetime(2024, 1, 1)
+    c = Column("dates")
+    c.fmt = "%Y-%m-%d"
+    c.addData([d0, d0 + timedelta(days=2), d0 + timedelta(days=1)])
+    n, mn, mx, mean, std = c.stats(verbose=True)
+    assert (n, mn, mx, mean) == (3, d0, d0 + timedelta(days=2), d0 + timedelta(days=1))
+    assert isinstance(std, timedelta)
+    
+    import io
+    out = io.StringIO()
+    c = Column("empty").addData([], ctype = 1.0)
+    assert c.stats(verbose = True, out = out)[0] == 0
+    c = Column("nulls").addData([None, None], ctype = 1)
+    assert c.stats(verbose = True, out = out)[:3] == (0, None, None)
+    assert "n/a" in out.getvalue()
 
 def test23_accum():
     c = Column("ints").addData([1, 2, 3, 4])
@@ -287,6 +320,302 @@ def test26__like():
     assert c.type == c1.type
     assert c.fmt == c1.fmt
     
+
+def test27_view():
+    c = Column("view").addData([0.0, 1.0, 2.0, 3.0, 4.0, 5.0])
+    c.setFormatStr("%4.2f")
+    v = c.view(1, 4)
+    assert len(v) == 3
+    assert v.type == "f"
+    assert v.format(0) == "1.00"
+    assert v[2] == 3.0
+    
+    v2 = c[::2]
+    assert list(v2) == [0.0, 2.0, 4.0]
+    assert v2[1:].data[0] == 2.0
+    
+    v[0] = 10.0          # copy on write
+    assert c[1] == 1.0
+    c.map(lambda i, e: -e)
+    assert v2[1] == 2.0
+    assert c[2] == -2.0
+    
+
+def test28_clone():
+    c = Column("clone").addData([1, 2, 3])
+    c.setAttr("unit", "m")
+    cc = c.clone()
+    assert cc.data is c.data
+    assert cc.attrs["unit"] == "m"
+    
+    cc.map(lambda i, e: e * 10)
+    assert c[2] == 3
+    assert cc[2] == 30
+    
+    c2 = c.clone()
+    c.append(4)
+    assert len(c2) == 3
+    assert len(c) == 4
+    
+
+def test29_slots():
+    c1 = Column("a").addData([0.1, 0.2])
+    c2 = Column("b").addData([0.3, 0.4])
+    assert not hasattr(c1, "__dict__")
+    assert c1._attrs is None
+    assert c1.tostr is c2.tostr
+    
+    c1.setAttr("unit", "m")
+    assert c1.attrs["unit"] == "m"
+    
+
+def test30_encode():
+    c = Column("station").addData(["B", "A", "B", "C", "A", "B"])
+    c.encode()
+    assert len(c.data.categories) == 3
+    assert c[0] == "B"
+    assert list(c) == ["B", "A", "B", "C", "A", "B"]
+    assert c.indexesOf("B") == [0, 2, 5]
+    assert c.indexesOf("Z") == []
+    assert c.argsort() == [1, 4, 0, 2, 5, 3]
+    
+    c.append("D")
+    c[1] = "C"
+    assert c.indexesOf("C") == [1, 3]
+    assert len(c.data.categories) == 4
+    
+    c.remove(lambda i, e: e == "B")
+    assert list(c) == ["C", "C", "A", "D"]
+    
+    c.decode()
+    assert isinstance(c.data, list)
+    
+    c = Column("ints").addData(["1", "2", "1", "1"]).encode()
+    c.convert("i")
+    assert c.data == [1, 2, 1, 1]
+    
+
+def test31_pack():
+    d = ["data/var1/a.txt", "data/var2/b.txt", "", "data/var1/ñ.txt"]
+    c = Column("paths").addData(d).pack()
+    assert list(c) == d
+    assert c[3] == "data/var1/ñ.txt"
+    assert c.lengths() == [len(s) for s in d]
+    assert c.indexesOf("") == [2]
+    assert c.indexesWithPrefix("data/var1") == [0, 3]
+    
+    c.append("x" * 150)
+    a = c.np()
+    assert a.dtype == "|S150", a.dtype
+    
+    c.map(lambda i, e: e.upper())
+    assert c[0] == "DATA/VAR1/A.TXT"
+    
+    c.remove(lambda i, e: len(e) > 100)
+    assert len(c) == 4
+    assert c.decode().data == [s.upper() for s in d]
+    
+
+def test32_nulls():
+    c = Column("level").addData(["1.5", "", "2.5", ""])
+    c.convert("f")
+    assert c.nnulls() == 2
+    assert c.isNull(1)
+    assert c[1] is None
+    assert list(c) == [1.5, None, 2.5, None]
+    
+    s = c.stats(verbose=False)
+    assert s[0] == 2
+    assert s[1] == 1.5
+    
+    c.append(None)
+    c.append(3.5)
+    c[1] = 0.5
+    assert c.nnulls() == 2
+    assert c.reduce(func = lambda i, e, r: r + e, result = 0.0) == 8.0
+    
+    c.map(lambda i, e: 2 * e)
+    assert c[0] == 3.0
+    assert c[3] is None
+    
+    v = c.view(1, 4)
+    assert v[2] is None
+    
+    c.remove(lambda i, e: e > 4.0)
+    assert list(c) == [3.0, 1.0, None, None]
+    assert c.indexesOf(3.0) == [0]
+    
+    c = Column("ints").addData([None, 1, None, 2])
+    assert c.type == "i"
+    assert c.nnulls() == 2
+    c.convert("f", default = 0.0)
+    assert c.nnulls() == 2
+    
+    
+def test33_operators():
+    a = Column("a").addData([1, 2, 3, 4])
+    b = Column("b").addData([0.5, 1.5, 2.5, 3.5])
+    
+    c = a + b
+    assert c.type == "f" and c.name == "(a + b)"
+    assert list(c) == [1.5, 3.5, 5.5, 7.5]
+    assert list(a * 2) == [2, 4, 6, 8] and (a * 2).type == "i"
+    assert list(10 - a) == [9, 8, 7, 6]
+    assert list(a / 2) == [0.5, 1.0, 1.5, 2.0]
+    assert (a / 2).type == "f"
+    assert list(2 ** a) == [2, 4, 8, 16]
+    assert (a ** -1).type == "f"
+    assert (a ** 2).type == "i" and list(a ** 2) == [1, 4, 9, 16]
+    e = Column("e").addData([2, -1, None, 1])
+    p = a ** e                                 # first element is an int, but not the second
+    assert p.type == "f" and list(p) == [1.0, 0.5, None, 4.0]
+    assert all(isinstance(x, float) for x in p if x is not None)
+    assert list(-a) == [-1, -2, -3, -4]
+    assert list(abs(-b)) == list(b)
+    
+    assert list(a > 2) == [False, False, True, True]
+    assert list(a <= b) == [False, False, False, False]
+    assert list(b.ne(1.5)) == [True, False, True, True]
+    
+    n = Column("n").addData([1.0, None, 3.0, None])
+    r = a + n
+    assert list(r) == [2.0, None, 6.0, None]
+    assert r.nnulls() == 2
+    assert list(n >= 1.0) == [True, False, True, False]
+    
+    s = Column("s").addData(["x", "y", "x", "z"]).encode()
+    assert list(s.eq("x")) == [True, False, True, False]
+    assert list(s.ne("w")) == [True] * 4
+    p = Column("p").addData(["x", "y", "x", "z"]).pack()
+    assert list(p.eq("y")) == [False, True, False, False]
+    assert len({a, b}) == 2
+    assert a in [b, a] and [b, a].index(a) == 1 and a != b
+    
+    
+def test34_masks():
+    from tbl.mask import Mask
+    from tbl.storage import Categorical
+    c = Column("depth").addData([1.0, 5.0, None, 12.0, 20.0, 8.0])
+    m = (c > 4.0) & (c < 15.0)
+    assert isinstance(m, Mask)
+    assert list(m) == [False, True, False, True, False, True]
+    assert list(~m) == [True, False, True, False, True, False]
+    assert list((c < 2.0) | (c > 15.0)) == [True, False, False, False, True, False]
+    assert m.count() == 3 and m.any() and not m.all()
+    assert c.indexes(m) == [1, 3, 5]
+    try:
+        if m: pass
+        assert False
+    except ValueError:
+        pass
+    
+    s = c.select(m)
+    assert list(s) == [5.0, 12.0, 8.0]
+    assert s.name == "select(depth)"
+    
+    c.remove(c > 10.0)
+    assert list(c) == [1.0, 5.0, None, 8.0]
+    assert c.nnulls() == 1
+    
+    k = Column("k").addData(["a", "b", "a", "c"]).encode()
+    r = k.select(k.eq("a"))
+    assert isinstance(r.data, Categorical) and list(r) == ["a", "a"]
+    p = Column("p").addData(["a", "b", "a", "c"]).pack()
+    assert list(p.select(p.ne("a"))) == ["b", "c"]
+    
+    
+def test35_track():
+    import math
+    c = Column("level").addData([1.0, 2.0, 3.0]).track()
+    assert c.stats(verbose=False) == (3, 1.0, 3.0, 2.0, math.sqrt(2.0 / 3.0))
+    assert c._running is not None
+    
+    c.append(5.0)
+    c.addData([None, 9.0])
+    assert c._running[0] == 5                     # updated, not recomputed
+    s = c.stats(verbose=False)
+    assert s[:4] == (5, 1.0, 9.0, 4.0)
+    assert abs(s[4] - math.sqrt(8.0)) < 1e-12
+    
+    c[0] = 0.0                                    # forces recompute
+    assert c._running is None
+    assert c.stats(verbose=False)[1] == 0.0
+    assert c._running is not None
+    
+    c.track(False)
+    c.append(10.0)
+    assert c._running is None
+    assert c.stats(verbose=False)[2] == 10.0
+    
+    
+def test36_quantile():
+    import random
+    vals = [random.random() for i in range(1001)]
+    c = Column("rand").addData(vals)
+    svals = sorted(vals)
+    assert c.median() == svals[500]
+    q = c.quantile([0.0, 0.25, 1.0])
+    assert q == [svals[0], svals[250], svals[-1]]
+    assert ("quantile", 0.25) in c._cache
+    
+    c = Column("ints").addData([4, None, 1, 3, 2])
+    assert c.median() == 2.5
+    assert c.quantile(0.0) == 1
+    c.append(10)
+    assert c.median() == 3
+    
+    
+def test37_index():
+    c = Column("level").addData([5.0, 1.0, None, 3.0, 9.0, 3.0])
+    assert c.between(2.0, 5.0) == [3, 5, 0]
+    assert c.ge(5.0) == [0, 4]
+    assert c.le(1.0) == [1]
+    assert c.searchsorted(3.0) == 1
+    assert c.searchsorted(3.0, side = "right") == 3
+    assert "index" in c._cache
+    
+    c[1] = 10.0                                 # index is rebuilt
+    assert c.le(1.0) == []
+    assert c.ge(9.5) == [1]
+    
+    c = Column("sorted").addData([1, 2, 2, 4, 8])
+    assert c.buildIndex()._cache["index"][1] is None     # data is already sorted
+    assert c.between(2, 4) == [1, 2, 3]
+    c.append(0)
+    assert c.le(1) == [5, 0]
+    
+    
+def test38_sorted():
+    c = Column("time").addData([1.0, 2.0, None, 2.0, 5.0])
+    assert c._sorted is None
+    assert c.isSorted() and not c.isSorted(reverse = True)
+    c.append(6.0)
+    assert c._sorted == 1                       # appending in order keeps flag
+    c.addData([7.0, None, 8.0])
+    assert c.isSorted()
+    c.append(0.0)
+    assert c._sorted == 0 and not c.isSorted()
+    c.remove(lambda i, e: e == 0.0)
+    assert c._sorted is None and c.isSorted()  # removing elements may sort the column
+    
+    u = Column("u").addData([1, 2, 0, 3])
+    assert not u.isSorted()
+    u.remove(u.eq(0))
+    assert u.isSorted()
+    u = Column("u").addData([3, 1, 2])
+    assert not u.isSorted() and u[1:].isSorted() and u.select(u.ne(3)).isSorted()
+    
+    d = Column("down").addData([3, 2, 2, 1])
+    assert d.isSorted(reverse = True)
+    assert d[::-1].isSorted()
+    d[0] = 0
+    assert d._sorted is None and not d.isSorted(reverse = True)
+    
+    s = Column("s").addData([1, 3, 5, 7])
+    assert s.isSorted()
+    assert s.select(s > 2)._sorted == 1
+    assert s.between(2, 6) == [1, 2]
+    
     
 def testit(t, wait = False):
     #try:
@@ -330,6 +659,18 @@ def test_all():
     testit(test24_store)
     testit(test25_telap)
     testit(test26_like)
+    testit(test27_view)
+    testit(test28_clone)
+    testit(test29_slots)
+    testit(test30_encode)
+    testit(test31_pack)
+    testit(test32_nulls)
+    testit(test33_operators)
+    testit(test34_masks)
+    testit(test35_track)
+    testit(test36_quantile)
+    testit(test37_index)
+    testit(test38_sorted)
     
     
 if __name__ == '__main__':  
@@ -150,6 +150,10 @@ def test14_clone():
     assert t2.name == "t2"
     assert len(t2) == len(t)
     # check deep copy
+    t2[1].map(lambda i, e: 2 * e)
+    assert t[1][1] == 1.2
+    assert t2[1][1] == 2.4
+    assert t2[0].data is t[0].data
 
 def test15_append():
     t  = Table("table0").add("p1", [0.0, 1.0]).add("t1", [1, 2]).add("e1", ['a', 'b'])
@@ -441,9 +445,17 @@ def test38_transpose():
     
     tt = t.transpose()
     tt.head()
+    assert tt.names() == ["c1", "11", "21", "31"]
+    assert list(tt["c1"]) == ["c2", "c3"]
+    assert list(tt["21"]) == [22, 23] and tt["21"].type == "i"
     
     t.wh()
     tt.wh()
+    
+    t.add("c4", ["a", "b"])                       # mixed types and not square
+    tt = t.transpose()
+    assert list(tt["31"]) == ["32", "33", None] and tt["31"].type == "s"
+    assert tt.nrows() == 3
 
 
 def test39_uniques():
@@ -560,6 +572,292 @@ def test46__subtable():
     t4.head()
     #t4.what()
 
+def test47_slice():
+    t  = Table("original")
+    t.add("time", [0.0, 1.0, 2.0, 3.0, 4.0])
+    t.add("temp", [0, 10, 40, 90, 160])
+    
+    s = t.slice(1, 3)
+    assert s.nrows() == 2
+    assert s[1][0] == 10
+    assert s[0].type == "f"
+    
+    s[1][0] = -1
+    assert t[1][1] == 10
+    
+    s = t.slice(3)
+    assert s.nrows() == 2
+    assert s["temp"][1] == 160
+    
+def test48_categorical():
+    fpath = "test_01table_categorical.txt"
+    t  = Table("table0")
+    t.add("station", ["s1", "s2", "s1", "s1"])
+    t.add("level", [1.0, 2.0, 3.0, 4.0])
+    t.save(fpath)
+    
+    t, sk = Table.read(fpath, maxCategories = 10)
+    assert t[0].data.categories == ["s1", "s2"]
+    assert t[1].data.categories == ["1", "2", "3", "4"]
+    
+    t, sk = Table.read(fpath, maxCategories = 2)
+    assert isinstance(t[1].data, list)
+    t.convert([1], ["f"])
+    
+    fpath = "test_01table_categorical.h5"
+    t.toH5(dst=fpath, verbose=False)
+    t, fpath = Table.fromH5(src=fpath)
+    assert t["station"].data.categories == ["s1", "s2"]
+    assert list(t["station"]) == ["s1", "s2", "s1", "s1"]
+    
+def test49_packed_toh5():
+    fpath = "test_01table_packed.h5"
+    long = "comment " * 30
+    t  = Table("table0")
+    t.add("comments", ["short", long, "ñandú"])
+    t["comments"].pack()
+    t.toH5(dst=fpath, verbose=False)
+    
+    t, fpath = Table.fromH5(src=fpath)
+    assert t["comments"][1] == long
+    assert t["comments"][2] == "ñandú"
+    
+def test50_nulls():
+    t  = Table("table0")
+    t.add("ints", [1, None, 3])
+    t.add("levels", [None, 1.5, 2.5])
+    t.add("strings", ["a", "b", None])
+    t.print()
+    
+    levels = Column("levels").addData([None], ctype = 0.0)
+    t2 = Table("table1").add("ints", [4]).add("levels", levels).add("strings", ["d"])
+    t.append(t2)
+    assert t["levels"].nnulls() == 2
+    assert t.row(3) == [4, None, "d"]
+    
+    assert t.select(lambda i, name: i > 0)["levels"].nnulls() == 2
+    assert t.uniques()["ints"][1] is None
+    assert list(t["levels"].view(1, 4)) == [1.5, 2.5, None]
+    t3 = t.clone()
+    t3.map(func = lambda r, c, e: None if e == 3 else e, cols = ["ints"])
+    assert list(t3["ints"]) == [1, None, None, 4] and t3["ints"].nnulls() == 2
+    
+    fpath = "test_01table_nulls.txt"
+    t.save(fpath, missing = "")
+    t1, sk = Table.read(fpath)
+    t1.convert([0, 1], ["i", "f"])
+    assert t1[0].nnulls() == 1
+    assert t1[1].nnulls() == 2
+    assert t1.row(2) == [3, 2.5, ""]
+    
+    fpath = "test_01table_nulls.h5"
+    t.toH5(dst=fpath, verbose=False)
+    t, fpath = Table.fromH5(src=fpath)
+    assert t["ints"][1] is None
+    assert t["strings"][2] is None
+    assert t["levels"].nnulls() == 2
+    
+    
+def test51_filter():
+    t = Table("stations")
+    t.add("id", ["a", "b", "c", "d", "e"])
+    t.add("depth", [1.0, 12.0, 15.0, None, 30.0])
+    t.add("temp", [10.0, 3.0, 5.0, 2.0, 1.0])
+    t["depth"].setAttr("units", "m")
+    
+    f = t.filter((t["depth"] > 10.0) & (t["temp"] < 4.0))
+    assert f.ncols() == 3
+    assert list(f["id"]) == ["b", "e"]
+    assert list(f["depth"]) == [12.0, 30.0]
+    assert f["depth"].attrs["units"] == "m"
+    
+    f = t.filter(~(t["depth"] > 10.0))
+    assert list(f["id"]) == ["a", "d"]
+    assert f["depth"][1] is None
+    assert len(t["id"]) == 5
+    
+    calls = []
+    def pred(i, r):
+        calls.append(len(r))
+        return r[0] is not None and r[0] > 10.0 and r[1] < 4.0
+    f = t.filter(pred, cols = ["depth", "temp"])
+    assert list(f["id"]) == ["b", "e"]
+    assert calls == [2] * 5
+    
+    f = t.filter(lambda i, r: i % 2 == 0)
+    assert list(f["id"]) == ["a", "c", "e"]
+    assert f["depth"].attrs["units"] == "m"
+    
+    
+def test52_pruned():
+    t  = Table("original")
+    t.add("time", [2.0, 1.0, 4.0, 3.0])
+    t.add("temp", [0, 10, 40, 90])
+    t.add("pressure", [0, 5, 8, 70])
+    
+    cols = []
+    l = t.collect(func = lambda r, c, e: cols.append(c) or e > 40, cols = ["temp"])
+    assert l == [90]
+    assert set(cols) == {1}
+    
+    assert t.collect(func = lambda j, c: c > 40, batch = True) == [90, 70]
+    l = t.collectrc(func = lambda j, c: c > 40, cols = ["pressure"], batch = True)
+    assert l == [(3, 2, 70)]
+    
+    t1 = t.subtable(func = lambda j, c: c >= 40, cols = [1, 2], batch = True)
+    assert t1.ncols() == 2
+    assert list(t1["temp"]) == [40, 90]
+    
+    t2 = t.clone()
+    t2.map(func = lambda r, c, e: -e, cols = ["temp"])
+    assert list(t2["temp"]) == [0, -10, -40, -90]
+    assert list(t2["pressure"]) == [0, 5, 8, 70]
+    assert list(t["temp"]) == [0, 10, 40, 90]
+    
+    t2.map(func = lambda j, c: c * 1.5, cols = ["pressure"], batch = True)
+    assert t2["pressure"].type == "f"
+    assert list(t2["pressure"]) == [0.0, 7.5, 12.0, 105.0]
+    t2.map(func = lambda j, c: [e + 1 for e in c], cols = ["time"], batch = True)
+    assert list(t2["time"]) == [3.0, 2.0, 5.0, 4.0]
+    assert list(t["time"]) == [2.0, 1.0, 4.0, 3.0]
+    
+    t3 = Table("nulls").add("a", [1.0, None, 3.0]).add("b", [0.0, 0.0, 0.0])
+    t3.map(func = lambda j, c: t3["a"], cols = ["b"], batch = True)
+    t3["b"][0] = None
+    assert list(t3["a"]) == [1.0, None, 3.0] and list(t3["b"]) == [None, None, 3.0]
+    t3.map(func = lambda j, c: [None, 2.0, 3.0], cols = ["a"], batch = True)
+    assert t3["a"].nnulls() == 1 and t3["a"].stats(verbose = False)[3] == 2.5
+    assert t3.collect(func = lambda j, c: [True] * len(c), cols = ["b"], batch = True) == [None, None, 3.0]
+    assert t3.collect(func = lambda r, c, e: True, cols = ["b"]) == [None, None, 3.0]
+    
+    t4 = Table("types").add("i", [1, 2, None]).add("j", [1, 2, 3])
+    t4.map(func = lambda j, c: [e / 2 if e is not None else None for e in c], cols = ["i"], batch = True)
+    assert t4["i"].type == "f" and list(t4["i"]) == [0.5, 1.0, None]
+    t4.map(func = lambda r, c, e: e / 2 if e > 1 else e, cols = ["j"])
+    assert t4["j"].type == "f" and list(t4["j"]) == [1.0, 1.0, 1.5]
+    
+    
+def test53_hashindex():
+    t = Table("readings")
+    t.add("station", ["A", "B", "A", "C", "A"])
+    t.add("day", [1, 1, 2, 1, 2])
+    t.add("level", [1.0, 2.0, None, 4.0, 5.0])
+    
+    t.buildHashIndex(["station"])
+    assert t.lookup("A") == [0, 2, 4]
+    assert t.lookup("Z") == []
+    r = t.lookup("A", copy = True)
+    assert list(r["level"]) == [1.0, None, 5.0]
+    assert r.ncols() == 3
+    assert t.lookup("Z", copy = True).ncols() == 3 and len(t.lookup("Z", copy = True)["level"]) == 0
+    
+    t.buildHashIndex(["station", "day"])
+    assert t.lookup(("A", 2), cols = ["station", "day"]) == [2, 4]
+    assert [r[2] for r in t.rows(t.lookup(("A", 2), cols = ["station", "day"]))] == [None, 5.0]
+    
+    idx = t._hashIndex(["station"])
+    assert idx is not None
+    t["station"][1] = "A"                  # index is outdated
+    assert t._hashIndex(["station"]) is None
+    assert len(t.lookup("A", cols = ["station"])) == 4
+    assert len(t.lookup("A", cols = "station")) == 4
+    assert t.lookup(2, cols = 1) == [2, 4]
+    t.lookup("A", cols = "station").clear()  # positions are a copy of the index entry
+    assert len(t.lookup("A", cols = "station")) == 4
+    r = t.lookup("C", cols = "station", copy = True)
+    r["level"][0] = 0.0                    # rows are copies
+    assert t["level"][3] == 4.0
+    
+    
+def test54_names():
+    t = Table("wide")
+    for i in range(2000): t.add("Sensor%04d"%i, [float(i)])
+    assert t.has("sensor1999") and "SENSOR0000" in t
+    assert t.index(["sensor0500", "missing", "Sensor0001"]) == [500, 1]
+    assert t["sensor0042"][0] == 42.0
+    
+    t.pop("sensor0000")
+    assert t["sensor0001"] is t[0]
+    t.remove(["sensor0001", "sensor0002"])
+    assert t.index(["sensor0003"]) == [0]
+    
+    t.rename({"sensor0003": "Depth"})
+    assert t.has("depth") and not t.has("sensor0003")
+    t.rename({t[1].name: "Level"})
+    assert t.index(["level"]) == [1]
+    
+    t.addID()
+    assert t.index(["id", "depth"]) == [0, 1]
+    t.add("depth", [0.0], allowRepetition = True)
+    assert t.index(["depth"]) == [1]
+    
+    t = Table("small").add("a", [1]).add("b", [2]).add("c", [3])
+    assert t.has("a")
+    t.cols[0], t.cols[1] = t.cols[1], t.cols[0]   # names of columns found are checked
+    assert t["a"].name == "a" and t.index(["b"]) == [0]
+    t.pop("c")
+    t.add("z", [4])
+    assert t.has("z") and not t.has("c")
+    
+    
+def test55_sortby():
+    t = Table("readings")
+    t.add("station", ["B", "A", "B", "A", "C"])
+    t.add("day", [2, 3, 1, 1, 2])
+    t.add("level", [1.0, None, 3.0, 4.0])          # not square
+    t["level"].setAttr("units", "m")
+    
+    t.sort(by = ["station", "day"])
+    assert list(t["station"]) == ["A", "A", "B", "B", "C"]
+    assert list(t["day"]) == [1, 3, 1, 2, 2]
+    assert list(t["level"]) == [4.0, None, 3.0, 1.0, None]
+    assert t["level"].attrs["units"] == "m"
+    assert t.isSquare()
+    
+    t.sort(by = ["station", "level"], ascending = [False, True])
+    assert list(t["station"]) == ["C", "B", "B", "A", "A"]
+    assert list(t["level"]) == [None, 1.0, 3.0, 4.0, None]
+    
+    t.sort(by = ["level"], ascending = False)
+    assert list(t["level"]) == [4.0, 3.0, 1.0, None, None]
+    assert t["level"].isSorted(reverse = True)
+    assert t["level"]._sorted == -1 and t["station"]._sorted is None
+    
+    t["station"].encode()
+    t.sort(by = ["station"])
+    assert list(t["station"]) == ["A", "A", "B", "B", "C"]
+
+def test56_concat():
+    t1 = Table("t1")
+    t1.add("station", ["A", "B"])
+    t1.add("level", [1.0, None])
+    t1["level"].setAttr("units", "m")
+    t2 = Table("t2")
+    t2.add("LEVEL", [3.0])
+    t2.add("day", [7, 8])                           # not square
+    t3 = Table("t3").add("station", ["C"]).add("day", [9])
+    
+    t = Table.concat([t1, t2, t3], name = "all")
+    assert t.name == "all" and t.names() == ["station", "level", "day"]
+    assert list(t["station"]) == ["A", "B", None, None, "C"]
+    assert list(t["level"]) == [1.0, None, 3.0, None, None]
+    assert list(t["day"]) == [None, None, 7, 8, 9]
+    assert t["day"].type == "i" and t["level"].attrs["units"] == "m"
+    assert t.nrows() == 5 and t.isSquare()
+    assert list(t1["level"]) == [1.0, None] and len(t1.cols) == 2
+    
+    t = Table.concat([t1, t1])
+    assert list(t["station"]) == ["A", "B", "A", "B"]
+    assert t["station"]._valid is None
+    
+    t2["day"].type = "f"
+    try:
+        Table.concat([t2, t3])
+        assert False, "types do not match"
+    except AssertionError as e:
+        assert "day" in str(e)
+    
+    
 def testit(t, wait = False):
     #try:
         #timeit(t, source=False)
@@ -622,6 +920,16 @@ def test_all():
     testit(test44__collectrc, wait=False)
     testit(test45__map, wait=False)
     testit(test46__subtable, wait=False)
+    testit(test47_slice, wait=False)
+    testit(test48_categorical, wait=False)
+    testit(test49_packed_toh5, wait=False)
+    testit(test50_nulls, wait=False)
+    testit(test51_filter, wait=False)
+    testit(test52_pruned, wait=False)
+    testit(test53_hashindex, wait=False)
+    testit(test54_names, wait=False)
+    testit(test55_sortby, wait=False)
+    testit(test56_concat, wait=False)
 
 if __name__ == '__main__':
     test_all()
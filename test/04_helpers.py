@@ -1,6 +1,6 @@
 from tbl.helpers import split_line, is_iterable, walker, break_date, touchit, \
                         read_tab_file, timeit, elapsed_time, datetime_list, \
-                        process_text, file_hash
+                        process_text, file_hash, sort_file
 import os
 import datetime
 
@@ -169,6 +169,46 @@ def test10_file_hash():
 def test11_report_missing():
     assert False, 'Not implemented yet'
     
+def test12_sort_file():
+    import random
+    from tbl.table import Table
+    src, dst = "test_04sort_src.csv", "test_04sort_dst.csv"
+    t = Table("unsorted")
+    t.add("station", [random.choice(["A", "B", "C"]) for i in range(3000)])
+    t.add("level", [float(random.randint(0, 100)) for i in range(3000)])
+    t.add("row", list(range(3000)))
+    t.save(src)
+    
+    n = sort_file(src, dst, by = ["station", "level"], memory_limit = 10000)
+    assert n == 3000
+    s, _ = Table.read(dst, verbose = False)
+    s.convert([1, 2], ["f", "i"])
+    keys = list(zip(s["station"], s["level"], s["row"]))
+    assert keys == sorted(keys)                 # stable, so rows with same key keep order
+    
+    import tbl
+    n = tbl.sort_file(src, dst, by = [1], ascending = False)
+    s, _ = Table.read(dst, verbose = False)
+    s.convert([1], ["f"])
+    assert list(s["level"]) == sorted(t["level"], reverse = True)
+    
+    from datetime import datetime, timedelta
+    d0 = datetime(2024, 1, 1)
+    dates = [d0 + timedelta(days = random.randint(0, 400), minutes = i) for i in range(500)]
+    with open(src, "w") as f:
+        f.write("date,row\n")
+        f.writelines("%s,%d\n"%(d.strftime("%d/%m/%Y %H:%M:%S"), i) for i, d in enumerate(dates))
+    n = sort_file(src, dst, by = ["date"], memory_limit = 500, max_files = 2)
+    assert n == 500
+    with open(dst) as f:
+        rows = [int(l.split(",")[1]) for l in f.readlines()[1:]]
+    assert rows == sorted(range(500), key = lambda i: dates[i])
+    
+    with open(src, "w") as f: f.write("")
+    assert sort_file(src, dst, by = [0]) == 0
+    os.remove(src)
+    os.remove(dst)
+    
 def testit(t, wait = False):
     #try:
         timeit(t, verbose = True, source=False)
@@ -189,4 +229,5 @@ if __name__ == '__main__':
     testit(test07_elapsed_time, wait=True)
     testit(test08_datetime_list, wait=True)
     #testit(test09_process_text, wait=True)
-    testit(test10_file_hash, wait=True)
\ No newline at end of file
+    testit(test10_file_hash, wait=True)
+    testit(test12_sort_file)
\ No newline at end of file
@@ -1,4 +1,4 @@
-from tbl.math import moving_average #, moving_average_fast
+from tbl.math import moving_average, nth_elements #, moving_average_fast
 from tbl.column import Column
 
 import numpy as np
@@ -16,6 +16,16 @@ def test00_moving_average():
     c = Column("rand").addData(ca)
     b = moving_average(c, k = 1, printeach=10)
     
+def test01_nth_elements():
+    import random
+    vals = [random.randint(0, 50) for i in range(2000)]
+    svals = sorted(vals)
+    ks = [0, 1, 999, 1000, 1999]
+    r = nth_elements(vals, ks)
+    assert r == {k: svals[k] for k in ks}
+    assert nth_elements(list(range(100)), [37]) == {37: 37}
+    assert nth_elements([3.0], [0]) == {0: 3.0}
+    
 def testit(t, wait = False):
     #try:
         #timeit(t, source=False)
@@ -27,4 +37,5 @@ def testit(t, wait = False):
     
     
 if __name__ == '__main__':
-    testit(test00_moving_average)
\ No newline at end of file
+    testit(test00_moving_average)
+    testit(test01_nth_elements)
\ No newline at end of file
@@ -0,0 +1,93 @@
+from tbl.sketch import Sketch, sketch_file
+from tbl.column import Column
+from tbl.table import Table
+from tbl.helpers import timeit
+
+import random
+import os
+
+def rank_error(values, q, v):
+    """ Returns the difference between the rank of v and the rank of quantile q as a fraction. """
+    n = len(values)
+    r = sum(1 for e in values if e < v)
+    return abs(r - q * n) / n
+
+def test00_quantile():
+    values = [random.gauss(0.0, 1.0) for i in range(50000)]
+    s = Sketch(seed = 1).extend(values)
+    assert len(s) == 50000
+    assert s.size < 2000
+    for q in [0.01, 0.25, 0.5, 0.75, 0.99]:
+        assert rank_error(values, q, s.quantile(q)) < 0.02
+    assert s.quantile([0.0, 1.0]) == [min(values), max(values)]
+    print(s)
+
+def test01_merge():
+    chunks = [[random.random() + i for j in range(10000)] for i in range(4)]
+    s = Sketch(seed = 2)
+    for ch in chunks:
+        s.merge(Sketch(seed = 3).extend(ch))
+    values = [v for ch in chunks for v in ch]
+    assert len(s) == len(values)
+    assert rank_error(values, 0.5, s.quantile(0.5)) < 0.02
+    
+    t = Sketch()
+    for v in range(100): t.update(v)
+    assert t.quantile(0.5) in range(45, 56)
+
+def test02_column():
+    c = Column("level").addData([float(i) for i in range(1000)] + [None])
+    s = c.sketch()
+    assert len(s) == 1000
+    assert abs(s.quantile(0.5) - 500.0) < 20.0
+    
+    c.track()
+    s = c.sketch()
+    assert c.sketch() is not s and c._sketch is not None
+    c.addData([float(i) for i in range(1000, 2000)])
+    assert len(s) == 1000 and len(c.sketch()) == 2000
+    s.merge(Sketch().extend([5000.0]))      # copy, so column is not changed
+    assert c.sketch().quantile(1.0) == 1999.0
+    c[0] = -1.0                     # sketch is recomputed
+    assert c.sketch().quantile(0.0) == -1.0
+    try:
+        s.merge(Sketch(k = 100))
+        assert False, "k must be the same"
+    except AssertionError as e:
+        assert "same k" in str(e)
+
+def test03_table_append():
+    t = Table("levels").add("level", [1.0, 2.0, 3.0])
+    t["level"].track().sketch()
+    t2 = Table("more").add("level", [4.0, 5.0])
+    t.append(t2)
+    s = t["level"].sketch()
+    assert len(s) == 5 and t["level"]._sketch.n == 5
+    assert s.quantile(1.0) == 5.0
+
+def test04_sketch_file():
+    src = "test_07sketch.csv"
+    with open(src, "w") as f:
+        f.write("time,level\n")
+        for i in range(5000): f.write("%d,%g\n"%(i, i * 0.5))
+        f.write("5000,\n")
+    s = sketch_file(src, "LEVEL", sep = ",")
+    os.remove(src)
+    assert len(s) == 5000
+    assert s.quantile(0.0) == 0.0 and s.quantile(1.0) == 2499.5
+    assert abs(s.quantile(0.5) - 1250.0) < 50.0
+
+def testit(t, wait = False):
+    #try:
+        timeit(t, verbose = True, source=False)
+        print("PASSED>> " + t.__name__)
+        if wait: input("PRESS ENTER...")
+    #except:
+    #    print("FAILED>> " + t.__name__)   
+   
+if __name__ == '__main__':
+    testit(test00_quantile)
+    testit(test01_merge)
+    testit(test02_column)
+    testit(test03_table_append)
+    testit(test04_sketch_file)
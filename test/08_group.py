@@ -0,0 +1,85 @@
+from tbl.table import Table
+from tbl.column import Column
+from tbl.group import GroupBy, AGGREGATIONS
+from tbl.helpers import timeit
+
+import math
+
+def create():
+    t = Table("levels")
+    t.add("station", ["A", "B", "A", "C", "B", "A"])
+    t.add("month", [1, 1, 2, 1, 1, 1])
+    t.add("WL", [1.0, 2.0, 3.0, None, 4.0, 5.0])
+    return t
+
+def test00_groupby():
+    t = create()
+    g = t.groupby("station")
+    assert len(g) == 3
+    s = g.agg({"WL": ["mean", "min", "max", "count", "sum"]})
+    assert list(s["station"]) == ["A", "B", "C"]
+    assert list(s["WL_mean"]) == [3.0, 3.0, None]
+    assert list(s["WL_min"]) == [1.0, 2.0, None]
+    assert list(s["WL_max"]) == [5.0, 4.0, None]
+    assert list(s["WL_count"]) == [3, 2, 0]
+    assert list(s["WL_sum"]) == [9.0, 6.0, None]
+    s.print()
+
+def test01_multikey():
+    t = create()
+    s = t.groupby(["station", "month"]).agg({"WL": "std", "month": "count"})
+    assert list(s["station"]) == ["A", "B", "A", "C"]
+    assert list(s["month"]) == [1, 1, 2, 1]
+    assert s["WL_std"][0] == 2.0 and s["WL_std"][1] == 1.0
+    assert list(s["month_count"]) == [2, 2, 1, 1]
+
+def test02_categorical_and_index():
+    t = create()
+    t["station"].encode()
+    s = t.groupby("station").agg({"WL": ["median", "first", "last"]})
+    assert list(s["station"]) == ["A", "B", "C"]
+    assert list(s["WL_median"]) == [3.0, 3.0, None]
+    assert list(s["WL_last"]) == [5.0, 4.0, None]
+    
+    t = create()
+    t.buildHashIndex(["station"])
+    g = t.groupby(["station"])
+    assert g.rows == [[0, 2, 5], [1, 4], [3]]
+    
+    AGGREGATIONS["range"] = lambda vals: max(vals) - min(vals) if vals else None
+    s = g.agg({"WL": "range"})
+    assert list(s["WL_range"]) == [4.0, 2.0, None]
+    del AGGREGATIONS["range"]
+
+def test03_types():
+    from datetime import datetime
+    t = create()
+    s = t.groupby("station").agg({"month": "median"})
+    assert list(s["month_median"]) == [1.0, 1.0, 1.0] and s["month_median"].type == "f"
+    assert all(isinstance(e, float) for e in s["month_median"])
+    
+    d = Column("date")
+    d.fmt = "%Y-%m-%d"
+    t.add("date", d.addData([datetime(2024, 1, i) for i in range(1, 7)]))
+    s = t.groupby("station").agg({"date": ["min", "max"]})
+    assert s["date_min"][0] == datetime(2024, 1, 1)
+    for a in ("mean", "sum", "median"):
+        try:
+            t.groupby("station").agg({"date": a})
+            assert False, "dates cannot be averaged"
+        except AssertionError as e:
+            assert "only implemented" in str(e)
+
+def testit(t, wait = False):
+    #try:
+        timeit(t, verbose = True, source=False)
+        print("PASSED>> " + t.__name__)
+        if wait: input("PRESS ENTER...")
+    #except:
+    #    print("FAILED>> " + t.__name__)   
+   
+if __name__ == '__main__':
+    testit(test00_groupby)
+    testit(test01_multikey)
+    testit(test02_categorical_and_index)
+    testit(test03_types)
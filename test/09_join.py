@@ -0,0 +1,114 @@
+from tbl.table import Table
+from tbl.column import Column
+from tbl.helpers import timeit
+
+def levels():
+    t = Table("levels")
+    t.add("station", ["A", "B", "A", "D", None])
+    t.add("WL", [1.0, 2.0, 3.0, 4.0, 5.0])
+    return t
+
+def stations():
+    t = Table("stations")
+    t.add("station", ["A", "B", "C"])
+    t.add("depth", [10.0, 20.0, 30.0])
+    t.add("WL", [0.1, 0.2, 0.3])
+    return t
+
+def test00_hash_join():
+    l, r = levels(), stations()
+    j = l.join(r, on = "station")
+    assert j.names() == ["station", "WL", "depth", "WL_right"]
+    assert list(j["station"]) == ["A", "B", "A"]
+    assert list(j["depth"]) == [10.0, 20.0, 10.0]
+    
+    j = l.join(r, on = "station", how = "left")
+    assert list(j["station"]) == ["A", "B", "A", "D", None]
+    assert list(j["depth"]) == [10.0, 20.0, 10.0, None, None]
+    
+    j = l.join(r, on = ["station"], how = "outer")
+    assert list(j["station"]) == ["A", "B", "A", "D", None, "C"]
+    assert list(j["WL"]) == [1.0, 2.0, 3.0, 4.0, 5.0, None]
+    assert list(j["depth"]) == [10.0, 20.0, 10.0, None, None, 30.0]
+    j.print()
+    
+    j = l.join(r, on = 0)
+    assert j.names() == ["station", "WL", "depth", "WL_right"]
+    assert list(j["depth"]) == [10.0, 20.0, 10.0]
+
+def test01_merge_join():
+    l = Table("l").add("t", [1, 2, 2, 4, 6]).add("a", [10, 20, 21, 40, 60])
+    r = Table("r").add("t", [2, 2, 3, 4]).add("b", [0.2, 0.25, 0.3, 0.4])
+    l.sort(by = ["t"])
+    r.sort(by = ["t"])
+    assert l["t"]._sorted == 1 and r["t"]._sorted == 1
+    
+    for how in ("inner", "left", "outer"):
+        m = l.join(r, on = "t", how = how)
+        l["t"]._sorted = None                    # force hash join
+        h = l.join(r, on = "t", how = how)
+        l["t"]._sorted = 1
+        rows = lambda t: sorted(zip(*[[e if e is not None else -1 for e in c] for c in t.cols]))
+        assert rows(m) == rows(h), how
+    
+    m = l.join(r, on = "t")
+    assert list(m["t"]) == [2, 2, 2, 2, 4]
+    assert list(m["b"]) == [0.2, 0.25, 0.2, 0.25, 0.4]
+    assert m["t"].isSorted()
+    m = l.join(r, on = "t", how = "outer")
+    assert list(m["t"]) == [1, 2, 2, 2, 2, 3, 4, 6]
+
+def test02_reuse_index():
+    l, r = levels(), stations()
+    r.buildHashIndex(["station"])
+    idx = r._hashIndex(["station"])
+    l.join(r, on = "station")
+    assert r._hashIndex(["station"]) is idx
+    
+    l, r = levels(), stations()
+    l.join(r, on = "station")
+    assert r._indexes is None                  # no index is kept for a single join
+
+def test03_asof_join():
+    from datetime import datetime, timedelta
+    d = lambda h: datetime(2024, 1, 1) + timedelta(hours = h)
+    def dates(vals):
+        c = Column("date")
+        c.fmt = "%Y-%m-%d %H:%M"
+        return c.addData(vals)
+    lv = Table("levels")
+    lv.add("date", dates([d(1), d(5), d(2), d(10), d(0)]))
+    lv.add("WL", [1.0, 2.0, 3.0, 4.0, 5.0])
+    rn = Table("rain")
+    rn.add("date", dates([d(0.5), d(1), d(4), d(9.5)]))
+    rn.add("rain", [0.1, 0.2, 0.3, 0.4])
+    
+    j = lv.asofJoin(rn, on = "date")
+    assert j.names() == ["date", "WL", "date_right", "rain"]
+    assert list(j["rain"]) == [0.2, 0.3, 0.2, 0.4, None]
+    assert j["date_right"][1] == d(4)
+    
+    j = lv.asofJoin(rn, on = "date", tolerance = timedelta(minutes = 45))
+    assert list(j["rain"]) == [0.2, None, None, 0.4, None]
+    assert len(lv.cols) == 2
+
+def test04_asof_sorted():
+    l = Table("l").add("t", [1.0, 2.0, 3.0, 4.0])
+    r = Table("r").add("t", [0.0, 2.5, 2.5, 3.5]).add("x", [0, 1, 2, 3])
+    j = l.asofJoin(r, on = "t", tolerance = 1.0)
+    assert list(j["x"]) == [0, None, 2, 3]
+
+def testit(t, wait = False):
+    #try:
+        timeit(t, verbose = True, source=False)
+        print("PASSED>> " + t.__name__)
+        if wait: input("PRESS ENTER...")
+    #except:
+    #    print("FAILED>> " + t.__name__)   
+   
+if __name__ == '__main__':
+    testit(test00_hash_join)
+    testit(test01_merge_join)
+    testit(test02_reuse_index)
+    testit(test03_asof_join)
+    testit(test04_asof_sorted)